@@ -0,0 +1,139 @@
+"""
+Shared helpers for the benchmark scripts: synthetic reports, latency
+percentiles and JSON result files.
+"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Peninsular Malaysia and Borneo, where the jurisdiction table has entries
+_REGIONS = (
+    (1.3, 6.7, 100.1, 104.3),
+    (0.9, 7.0, 109.6, 119.3),
+)
+_SIZES = (
+    ("Small", "Green", "4 hours"),
+    ("Medium", "Yellow", "1 day"),
+    ("Large", "Red", "3 days"),
+)
+_STATUSES = ("Reported", "Analyzed", "In Progress", "Finished")
+_STATUS_WEIGHTS = (1, 3, 2, 4)
+
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    """A (lat, lng) somewhere in Malaysia."""
+    lat_lo, lat_hi, lng_lo, lng_hi = _REGIONS[rng.random() < 0.3]
+    return round(rng.uniform(lat_lo, lat_hi), 6), round(rng.uniform(lng_lo, lng_hi), 6)
+
+
+def synthetic_reports(count: int, seed: int = 0, days: int = 30) -> list[dict]:
+    """
+    `count` analysed reports spread over the last `days` days, shaped like
+    the ones the API stores. Ids are "bench0000001" onwards.
+    """
+    from services.jurisdiction import resolve_jurisdictions
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    points = [random_point(rng) for _ in range(count)]
+    names = resolve_jurisdictions([p[0] for p in points], [p[1] for p in points])
+    reports = []
+    for i, ((lat, lng), jurisdiction) in enumerate(zip(points, names)):
+        created = now - timedelta(seconds=rng.uniform(0, days * 86400))
+        size, color, duration = rng.choice(_SIZES)
+        status = rng.choices(_STATUSES, _STATUS_WEIGHTS)[0]
+        history = [{"status": "Reported", "at": created.isoformat()}]
+        if status != "Reported":
+            at = created + timedelta(hours=rng.uniform(0.01, 72))
+            history.append({"status": status, "at": min(at, now).isoformat()})
+        reports.append(
+            {
+                "id": f"bench{i + 1:07d}",
+                "user_lat": lat,
+                "user_long": lng,
+                "image_file": f"/api/reports/bench{i + 1:07d}/image",
+                "timestamp": created.isoformat(),
+                "is_pothole": True,
+                "size_category": size,
+                "priority_color": color,
+                "jurisdiction": jurisdiction,
+                "estimated_duration": duration,
+                "status": status,
+                "status_history": history,
+            }
+        )
+    return reports
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def latency_summary(samples: list[float]) -> dict:
+    """Count, mean and p50 / p95 / p99 / max of latencies given in seconds."""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": _ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        "p50_ms": _ms(percentile(ordered, 50)),
+        "p95_ms": _ms(percentile(ordered, 95)),
+        "p99_ms": _ms(percentile(ordered, 99)),
+        "max_ms": _ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def save_results(kind: str, params: dict, results: dict, path: str | None = None) -> str:
+    """
+    Write a result file (with the commit, interpreter and parameters it was
+    produced with) and return its path. By default it goes to
+    benchmarks/results/<kind>-<timestamp>.json.
+    """
+    created = datetime.now(timezone.utc)
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(
+            RESULTS_DIR, f"{kind}-{created.strftime('%Y%m%dT%H%M%SZ')}.json"
+        )
+    document = {
+        "benchmark": kind,
+        "created": created.isoformat(),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    return path
@@ -0,0 +1,81 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare base.json new.json [--threshold 0.1]
+
+Every timing (`*_ms`, `*_us`) and rate (`rps`, `ops_per_sec`) present in
+both files is listed with its relative change. Exits with status 1 if a
+timing grew, or a rate fell, by more than the threshold (default 10%).
+"""
+
+import argparse
+import json
+import sys
+
+_LOWER_IS_BETTER = ("_ms", "_us")
+_HIGHER_IS_BETTER = ("rps", "ops_per_sec")
+
+
+def _metrics(node, prefix: str = "") -> dict[str, float]:
+    """Flatten the timings and rates in a result tree to {path: value}."""
+    found = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            path = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if key.endswith(_LOWER_IS_BETTER) or key in _HIGHER_IS_BETTER:
+                    found[path] = float(value)
+            else:
+                found.update(_metrics(value, path))
+    return found
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    """(metric, base, new, change, regressed) for every shared metric."""
+    if base.get("benchmark") != new.get("benchmark"):
+        raise SystemExit(
+            f"Cannot compare a {base.get('benchmark')!r} result with a "
+            f"{new.get('benchmark')!r} one"
+        )
+    # Server stats of a load run are context, not measurements
+    base_metrics = _metrics({k: v for k, v in base["results"].items() if k != "server"})
+    new_metrics = _metrics({k: v for k, v in new["results"].items() if k != "server"})
+    rows = []
+    for path in sorted(base_metrics.keys() & new_metrics.keys()):
+        before, after = base_metrics[path], new_metrics[path]
+        change = (after - before) / before if before else 0.0
+        key = path.rsplit(".", 1)[-1]
+        worse = change if key.endswith(_LOWER_IS_BETTER) else -change
+        rows.append((path, before, after, change, worse > threshold))
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed relative slowdown"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    rows = compare(base, new, args.threshold)
+    print(f"base {base.get('git_commit')} ({base['created']})")
+    print(f"new  {new.get('git_commit')} ({new['created']})\n")
+    width = max((len(row[0]) for row in rows), default=10)
+    for path, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{path:<{width}} {before:>12.3f} {after:>12.3f} {change:>+8.1%}{flag}")
+
+    regressions = sum(row[4] for row in rows)
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+End-to-end load test of the API with the fake model backend.
+
+    python -m benchmarks.load                      # 50 citizens, 5 dashboards, 60 s
+    python -m benchmarks.load --citizens 200 --dashboards 20 --seed-reports 100000
+    python -m benchmarks.load --url http://localhost:8000   # a running server
+
+Citizens post reports (a JPEG from a pool of generated photos, at a random
+spot in Malaysia) with exponential think times in between. Dashboards poll
+the report list: a full list first and every --full-list-every polls, and
+`?since=` deltas in between. On every poll they also set a report's status
+and load one of the four insights. Each request is timed and the result
+lists throughput and p50 / p95 / p99 latency per route, plus the server's
+queue, quota and backend stats at the end.
+
+By default the app runs in this process (its lifespan included) with
+LLM_BACKEND=fake and an in-memory store, so no key or network is needed.
+The FAKE_LLM_* variables shape the stand-in's latency and failures (see
+services/llm_backend.py); fix FAKE_LLM_SEED for repeatable runs. Client and
+server then share one CPU-bound event loop, so for absolute numbers run the
+server separately (with LLM_BACKEND=fake) and pass --url.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Settings are read at import: select offline backends before importing the app
+os.environ.setdefault("REPORT_STORE", "memory")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("IMAGE_STORE_DIR", tempfile.mkdtemp(prefix="potsoft-bench-"))
+if os.environ["REPORT_STORE"] == "sqlite":
+    os.environ.setdefault(
+        "REPORT_DB_PATH", os.path.join(os.environ["IMAGE_STORE_DIR"], "reports.db")
+    )
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+
+from benchmarks.common import latency_summary, random_point, save_results, synthetic_reports
+
+INSIGHTS = ("summary", "trends", "recommendations", "jurisdictions")
+STATUSES = ("In Progress", "Finished")
+
+
+async def _think(rng: random.Random, mean: float, deadline: float) -> None:
+    """An exponential think time, cut short at the deadline."""
+    await asyncio.sleep(
+        max(0.0, min(rng.expovariate(1 / mean), deadline - time.perf_counter()))
+    )
+
+
+class _Recorder:
+    """Latencies and errors per route, ignoring requests made during warmup."""
+
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(self, http: httpx.AsyncClient, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await http.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - started
+        if started >= self.warmup_until:
+            self.latencies[route].append(elapsed)
+            if response is None or response.status_code >= 400:
+                self.errors[route] += 1
+        return response
+
+    def summary(self, seconds: float) -> dict:
+        routes = {}
+        for route in sorted(self.latencies):
+            samples = self.latencies[route]
+            routes[route] = {
+                **latency_summary(samples),
+                "errors": self.errors[route],
+                "rps": round(len(samples) / seconds, 2),
+            }
+        everything = [s for samples in self.latencies.values() for s in samples]
+        return {
+            "routes": routes,
+            "total": {
+                **latency_summary(everything),
+                "errors": sum(self.errors.values()),
+                "rps": round(len(everything) / seconds, 2),
+            },
+        }
+
+
+def _photos(count: int, seed: int) -> list[bytes]:
+    """Distinct noise JPEGs, about the size of a downscaled phone photo."""
+    from PIL import Image
+
+    photos = []
+    for i in range(count):
+        buf = io.BytesIO()
+        Image.effect_noise((800, 600), 20 + (seed + i) % 80).convert("RGB").save(
+            buf, "JPEG", quality=85
+        )
+        photos.append(buf.getvalue())
+    return photos
+
+
+async def _citizen(http, recorder, rng, photos, ids, deadline, think):
+    while time.perf_counter() < deadline:
+        lat, lng = random_point(rng)
+        response = await recorder.request(
+            http,
+            "POST /api/reports",
+            "POST",
+            "/api/reports",
+            data={"lat": str(lat), "long": str(lng)},
+            files={"image": ("photo.jpg", rng.choice(photos), "image/jpeg")},
+        )
+        if response is not None and response.status_code == 202:
+            ids.append(response.json()["id"])
+        await _think(rng, think, deadline)
+
+
+async def _dashboard(http, recorder, rng, ids, deadline, think, full_every):
+    version = None
+    polls = 0
+    while time.perf_counter() < deadline:
+        if version is None or polls % full_every == 0:
+            response = await recorder.request(
+                http, "GET /api/reports", "GET", "/api/reports"
+            )
+        else:
+            response = await recorder.request(
+                http,
+                "GET /api/reports?since",
+                "GET",
+                "/api/reports",
+                params={"since": version},
+            )
+        if response is not None and response.status_code == 200:
+            version = response.headers.get("X-Store-Version", version)
+        polls += 1
+
+        if ids:
+            await recorder.request(
+                http,
+                "PATCH /api/reports/{id}/status",
+                "PATCH",
+                f"/api/reports/{rng.choice(ids)}/status",
+                json={"status": rng.choice(STATUSES)},
+            )
+        kind = rng.choice(INSIGHTS)
+        await recorder.request(
+            http, f"GET /api/insights/{kind}", "GET", f"/api/insights/{kind}"
+        )
+        await _think(rng, think, deadline)
+
+
+async def _server_stats(http: httpx.AsyncClient) -> dict:
+    stats = {}
+    for name, url in (
+        ("analysis_queue", "/api/reports/analysis-queue"),
+        ("quota", "/analyze/quota"),
+        ("circuits", "/analyze/circuits"),
+        ("backend", "/analyze/backend"),
+        ("insights_cache", "/api/insights/cache-stats"),
+    ):
+        try:
+            response = await http.get(url)
+            stats[name] = response.json() if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError):
+            stats[name] = None
+    return stats
+
+
+async def _drive(http: httpx.AsyncClient, args) -> dict:
+    rng = random.Random(args.seed)
+    photos = _photos(args.photos, args.seed)
+    listing = await http.get("/api/reports", params={"fields": "id"})
+    listing.raise_for_status()
+    ids = [r["id"] for r in listing.json()]
+
+    started = time.perf_counter()
+    deadline = started + args.warmup + args.duration
+    recorder = _Recorder(started + args.warmup)
+    users = [
+        _citizen(
+            http, recorder, random.Random(rng.random()), photos, ids, deadline,
+            args.citizen_think,
+        )
+        for _ in range(args.citizens)
+    ] + [
+        _dashboard(
+            http, recorder, random.Random(rng.random()), ids, deadline,
+            args.dashboard_think, args.full_list_every,
+        )
+        for _ in range(args.dashboards)
+    ]
+    await asyncio.gather(*users)
+    # Think times stop at the deadline; requests still running then were
+    # waited for and count towards the measured time
+    measured = max(time.perf_counter() - started - args.warmup, 1e-9)
+    return {
+        **recorder.summary(measured),
+        "measured_seconds": round(measured, 2),
+        "server": await _server_stats(http),
+    }
+
+
+async def _run(args) -> dict:
+    timeout = httpx.Timeout(args.timeout)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as http:
+            return await _drive(http, args)
+
+    from main import app
+    from store import reports
+
+    if args.seed_reports:
+        reports.add_many(synthetic_reports(args.seed_reports, seed=args.seed))
+    limits = httpx.Limits(max_connections=None)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://potsoft", timeout=timeout, limits=limits
+        ) as http:
+            return await _drive(http, args)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--citizens", type=int, default=50, help="simulated citizens (N)")
+    parser.add_argument("--dashboards", type=int, default=5, help="contractor dashboards (M)")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds first")
+    parser.add_argument(
+        "--citizen-think", type=float, default=2.0, help="mean seconds between posts"
+    )
+    parser.add_argument(
+        "--dashboard-think", type=float, default=5.0, help="mean seconds between polls"
+    )
+    parser.add_argument(
+        "--full-list-every", type=int, default=10, help="polls per full list reload"
+    )
+    parser.add_argument(
+        "--seed-reports", type=int,
+        help="synthetic reports added to the store first (in-process only, default 1000)",
+    )
+    parser.add_argument("--photos", type=int, default=32, help="distinct photos to post")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="base URL of a running server instead of in-process")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+    if args.url:
+        if args.seed_reports:
+            print("--seed-reports only applies in-process; ignored with --url")
+        args.seed_reports = 0
+    elif args.seed_reports is None:
+        args.seed_reports = 1000
+
+    results = asyncio.run(_run(args))
+
+    params = {k: v for k, v in vars(args).items() if k != "out"}
+    if not args.url:
+        params["report_store"] = os.environ["REPORT_STORE"]
+        params["llm_backend"] = os.environ["LLM_BACKEND"]
+        params["fake_llm"] = {
+            k: v for k, v in os.environ.items() if k.startswith("FAKE_LLM_")
+        }
+
+    print(f"\n{'route':<34}{'count':>8}{'err':>6}{'rps':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, s in [*results["routes"].items(), ("total", results["total"])]:
+        print(f"{route:<34}{s['count']:>8}{s['errors']:>6}{s['rps']:>9}"
+              f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+    print(f"\nSaved {save_results('load', params, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Microbenchmarks for hot helpers, each timed at several store sizes.
+
+    python -m benchmarks.micro                       # 1k, 100k and 1M reports
+    python -m benchmarks.micro --sizes 1000,100000 --out base.json
+
+For every size N an in-memory store is filled with N synthetic reports, and
+the same listeners the API attaches (aggregates, clusters, change feed,
+revisions, serialised JSON) are subscribed to it, so writes pay what they
+pay in production. Each benchmark then runs:
+
+  build_data_summary    `insights_service._build_data_summary`: the first
+                        call (aggregates built from the store) and warm calls
+  resolve_jurisdiction  N single lookups
+  parse_gemini_response N parses of a mix of clean, fenced and bad replies
+  update_report_status  the PATCH handler, on up to --writes reports
+
+1M reports need a few GB of memory.
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Settings are read at import: select offline backends before importing the app
+os.environ.setdefault("REPORT_STORE", "memory")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("IMAGE_STORE_DIR", tempfile.mkdtemp(prefix="potsoft-bench-"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.common import random_point, save_results, synthetic_reports
+
+_REPLIES = (
+    '{"is_pothole": true, "size_category": "Large", "priority_color": "Red", '
+    '"estimated_duration": "3 days", "jurisdiction": "MBPP George Town"}',
+    '```json\n{"is_pothole": true, "size_category": "Medium", '
+    '"priority_color": "Yellow", "estimated_duration": "1 day"}\n```',
+    '{"is_pothole": false, "size_category": "Huge", "priority_color": "Blue"}',
+    "Sorry, I can't analyse this image.",
+)
+
+
+def _timed(fn, ops: int) -> dict:
+    """Run `fn` (which performs `ops` operations) once and report its rate."""
+    gc.collect()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    return {
+        "ops": ops,
+        "total_ms": round(elapsed * 1000, 3),
+        "per_op_us": round(elapsed / ops * 1e6, 3) if ops else 0.0,
+        "ops_per_sec": round(ops / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def bench_build_data_summary(store, repeat: int) -> dict:
+    from services.insights_service import _build_data_summary
+
+    return {
+        "cold": _timed(lambda: _build_data_summary(store), 1),
+        "warm": _timed(
+            lambda: [_build_data_summary(store) for _ in range(repeat)], repeat
+        ),
+    }
+
+
+def bench_resolve_jurisdiction(count: int, seed: int) -> dict:
+    from services.jurisdiction import resolve_jurisdiction
+
+    rng = random.Random(seed)
+    points = [random_point(rng) for _ in range(count)]
+    return _timed(lambda: [resolve_jurisdiction(*p) for p in points], count)
+
+
+def bench_parse_gemini_response(count: int) -> dict:
+    from services.gemini_service import parse_gemini_response
+
+    replies = [_REPLIES[i % len(_REPLIES)] for i in range(count)]
+    return _timed(lambda: [parse_gemini_response(r) for r in replies], count)
+
+
+def bench_update_report_status(store, writes: int, seed: int) -> dict:
+    import routes.reports as report_routes
+    from schemas.response_model import StatusUpdateRequest
+
+    rng = random.Random(seed)
+    ids = rng.sample([r["id"] for r in store], min(writes, len(store)))
+    statuses = ("In Progress", "Finished", "Analyzed")
+    bodies = [StatusUpdateRequest(status=statuses[i % 3]) for i in range(len(ids))]
+
+    async def run():
+        for report_id, body in zip(ids, bodies):
+            await report_routes.update_report_status(report_id, body)
+
+    # The handler writes to the module's store
+    previous, report_routes.reports = report_routes.reports, store
+    try:
+        return _timed(lambda: asyncio.run(run()), len(ids))
+    finally:
+        report_routes.reports = previous
+
+
+def _attach_listeners(store) -> None:
+    """Subscribe the per-store services the API creates for its store."""
+    from services.change_feed import change_feed_for
+    from services.clustering import clusters_for
+    from services.report_aggregates import aggregates_for
+    from services.report_json import report_json_for
+    from services.report_revisions import revisions_for
+
+    for accessor in (
+        change_feed_for,
+        revisions_for,
+        report_json_for,
+        clusters_for,
+        aggregates_for,
+    ):
+        accessor(store)
+
+
+def run(sizes: list[int], repeat: int, writes: int, seed: int) -> dict:
+    from store import MemoryReportStore
+
+    results = {}
+    for size in sizes:
+        print(f"{size} reports: building store...", flush=True)
+        started = time.perf_counter()
+        store = MemoryReportStore(synthetic_reports(size, seed=seed))
+        setup_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        print(f"{size} reports: build_data_summary", flush=True)
+        summary = bench_build_data_summary(store, repeat)
+        _attach_listeners(store)
+        print(f"{size} reports: update_report_status", flush=True)
+        update = bench_update_report_status(store, writes, seed)
+        del store
+        gc.collect()
+
+        print(f"{size} reports: resolve_jurisdiction", flush=True)
+        resolve = bench_resolve_jurisdiction(size, seed)
+        print(f"{size} reports: parse_gemini_response", flush=True)
+        parse = bench_parse_gemini_response(size)
+
+        results[str(size)] = {
+            "setup_ms": setup_ms,
+            "build_data_summary": summary,
+            "resolve_jurisdiction": resolve,
+            "parse_gemini_response": parse,
+            "update_report_status": update,
+        }
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        default="1000,100000,1000000",
+        help="comma-separated store sizes (default: 1000,100000,1000000)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=100, help="warm build_data_summary calls"
+    )
+    parser.add_argument(
+        "--writes", type=int, default=10000, help="status updates per store size"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="result file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    params = {
+        "sizes": sizes,
+        "repeat": args.repeat,
+        "writes": args.writes,
+        "seed": args.seed,
+    }
+    results = run(sizes, args.repeat, args.writes, args.seed)
+
+    for size, result in results.items():
+        summary = result["build_data_summary"]
+        print(f"\n{size} reports (per call)")
+        print(f"  build_data_summary    cold {summary['cold']['total_ms']} ms, "
+              f"warm {summary['warm']['per_op_us']} us")
+        print(f"  resolve_jurisdiction  {result['resolve_jurisdiction']['per_op_us']} us")
+        print(f"  parse_gemini_response {result['parse_gemini_response']['per_op_us']} us")
+        print(f"  update_report_status  {result['update_report_status']['per_op_us']} us")
+    print(f"\nSaved {save_results('micro', params, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.upload_limit import (
+    MAX_BULK_UPLOAD_BYTES,
+    MAX_UPLOAD_BYTES,
+    UploadLimitMiddleware,
+)
 from routes import analyze
 from routes import reports
 from routes import insights
+from routes import metrics
+from services.analysis_worker import analysis_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background Gemini analysis of submitted reports
+    analysis_workers.start()
+    yield
+    await analysis_workers.stop()
+
 
 app = FastAPI(
     title="PotSoft API",
     description="Pothole detection & reporting API powered by Gemini Vision.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware to allow requests from the Flutter app
@@ -17,12 +38,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    # Pagination cursor, version / delta-sync point and ETag for
+    # GET /api/reports; preprocessing gain on uploads
+    expose_headers=[
+        "X-Next-Cursor",
+        "X-Store-Version",
+        "ETag",
+        "X-Image-Bytes-Saved",
+    ],
 )
 
+# Reject oversized image uploads while they stream in
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/api/reports": MAX_UPLOAD_BYTES,
+        "/api/reports/bulk": MAX_BULK_UPLOAD_BYTES,
+        "/analyze": MAX_UPLOAD_BYTES,
+    },
+)
+
+# gzip / brotli for JSON and NDJSON responses, per Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so request latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(analyze.router)
 app.include_router(reports.router)
 app.include_router(insights.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
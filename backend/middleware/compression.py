@@ -0,0 +1,139 @@
+"""
+Response compression negotiated via Accept-Encoding.
+
+JSON report lists compress roughly tenfold. This ASGI middleware encodes
+responses with brotli (when the `brotli` package is installed) or gzip,
+whichever the client accepts, preferring brotli. Responses are left alone if
+they are smaller than COMPRESS_MIN_BYTES, already encoded, or not text-like
+(images are already compressed). Server-Sent Events are also left alone,
+because proxies and EventSource clients expect them unencoded.
+
+A complete body is compressed in one go, off the event loop once it is
+large. Streamed bodies (the NDJSON bulk import and insights streams) are
+compressed chunk by chunk with a flush after each, so every line still
+reaches the client as soon as it is written.
+"""
+
+import asyncio
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "5"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Bodies above this are compressed in a worker thread
+_THREAD_THRESHOLD = 256 * 1024
+
+
+def _negotiate(accept_encoding: str) -> str | None:
+    """The encoding to use for an Accept-Encoding header, or None."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return (
+        "content-encoding" not in headers
+        and content_type.startswith(_COMPRESSIBLE_TYPES)
+        and not content_type.startswith("text/event-stream")
+    )
+
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        else:
+            # wbits=31: gzip container
+            self._zlib = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        """Compress `data` and flush, so the output so far is decodable."""
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Compress text-like responses for clients that accept it."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = _negotiate(Headers(scope=scope).get("accept-encoding", ""))
+
+        start = None
+        encoder: _Encoder | None = None
+
+        async def compressing_send(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows what we've got
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                if _compressible(headers):
+                    headers.add_vary_header("Accept-Encoding")
+                    if encoding is not None and (
+                        more_body or len(body) >= self.minimum_size
+                    ):
+                        encoder = _Encoder(encoding)
+                        headers["Content-Encoding"] = encoding
+                        if more_body:
+                            del headers["Content-Length"]
+                if encoder is not None and not more_body:
+                    if len(body) > _THREAD_THRESHOLD:
+                        body = await asyncio.to_thread(encoder.encode, body, True)
+                    else:
+                        body = encoder.encode(body, True)
+                    headers["Content-Length"] = str(len(body))
+                    encoder = None
+                    message = {"type": "http.response.body", "body": body}
+                await send(start)
+                start = None
+            if encoder is not None:
+                message = {
+                    "type": "http.response.body",
+                    "body": encoder.encode(body, final=not more_body),
+                    "more_body": more_body,
+                }
+            await send(message)
+
+        await self.app(scope, receive, compressing_send)
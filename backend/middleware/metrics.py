@@ -0,0 +1,95 @@
+"""
+Per-route request metrics.
+
+Every HTTP request is counted by method, route template and status. Its
+duration is observed in a latency histogram by method and route. Templates
+like `/api/reports/{report_id}/status` keep the number of series bounded.
+FastAPI stores the matched route in the request scope, and the template is
+read from there after the response. Paths no route matches are grouped as
+"unmatched".
+
+In-flight requests are not counted per route as they run. The middleware
+only keeps a map of the scopes currently being handled, and the gauge
+groups them by route when /metrics is scraped. A request still being
+routed at that moment shows up as "unmatched".
+
+The duration runs until the last body chunk has been sent, so streamed
+responses (NDJSON, Server-Sent Events) count for as long as they stream.
+An event-stream client therefore shows up as an in-flight request while
+it is connected.
+"""
+
+import time
+
+from services.metrics import registry
+
+UNMATCHED = "unmatched"
+
+_requests = registry.counter(
+    "potsoft_http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+_duration = registry.histogram(
+    "potsoft_http_request_duration_seconds",
+    "HTTP request latency until the response has been sent.",
+    ("method", "route"),
+)
+
+_active: dict[int, dict] = {}  # id(scope) -> scope of requests being handled
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Plain Starlette routes (the docs pages) only leave their endpoint;
+    # none of them take path parameters
+    return scope["path"] if "endpoint" in scope else UNMATCHED
+
+
+def _in_flight() -> dict:
+    # Routes seen before report 0 rather than vanishing between requests
+    counts = dict.fromkeys(_duration.label_sets(), 0)
+    for scope in list(_active.values()):
+        key = (scope["method"], _route(scope))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+registry.callback(
+    "potsoft_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    _in_flight,
+    ("method", "route"),
+)
+
+
+class MetricsMiddleware:
+    """Count, time and track in-flight HTTP requests per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        started = time.perf_counter()
+        key = id(scope)
+        _active[key] = scope
+
+        async def recording_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            del _active[key]
+            labels = (scope["method"], _route(scope))
+            _duration.observe(time.perf_counter() - started, labels)
+            _requests.inc((*labels, status))
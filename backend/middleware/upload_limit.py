@@ -0,0 +1,73 @@
+"""
+Request body size limit for upload endpoints.
+
+The multipart parser spools file parts to a temporary file as they arrive,
+so memory stays bounded, but it would happily spool any size to disk. This
+ASGI middleware counts body bytes as they are received and raises a 413
+HTTPException from `receive` as soon as a limited route goes over its
+limit, which FastAPI passes through to its exception handling. Requests
+that declare an oversized Content-Length are rejected before any of the
+body is read.
+"""
+
+import json
+import os
+
+from fastapi import HTTPException
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MAX_BULK_UPLOAD_BYTES = int(
+    os.getenv("MAX_BULK_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024))
+)
+
+
+def _detail(limit: int) -> str:
+    return f"Upload exceeds the maximum size of {limit} bytes."
+
+
+class UploadLimitMiddleware:
+    """Cap the request body of POSTs to the given paths (path -> max bytes)."""
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limit = self.limits.get(scope["path"].rstrip("/") or "/")
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                return await self._reject(send, limit)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=_detail(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, limit: int) -> None:
+        body = json.dumps({"detail": _detail(limit)}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi import APIRouter, File, UploadFile, HTTPException, Response
+from services.circuit_breaker import CircuitOpenError
+from services.gemini_client import client
 from services.gemini_service import analyze_image
+from services.image_preprocess import preprocessor
 from schemas.response_model import AnalysisResponse
-import base64
+import math
 import os
 
 router = APIRouter()
@@ -11,7 +14,7 @@ ALLOWED_IMAGE_EXTENSIONS = {
 }
 
 @router.post("/analyze", response_model=AnalysisResponse)
-async def analyze(file: UploadFile = File(...)):
+async def analyze(response: Response, file: UploadFile = File(...)):
     """
     Endpoint to upload an image and get an analysis from the Gemini Vision API.
     """
@@ -23,16 +26,55 @@ async def analyze(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="File provided is not an image.")
 
     try:
-        contents = await file.read()
-        image_base64 = base64.b64encode(contents).decode("utf-8")
-        
         mime_type = file.content_type if file.content_type and file.content_type.startswith('image/') else f"image/{os.path.splitext(file.filename or '')[1].lstrip('.')}"
-        analysis_result = analyze_image(image_base64, mime_type)
+        processed = await preprocessor.process(file.file, mime_type)
+        response.headers["X-Image-Bytes-Saved"] = str(processed.bytes_saved)
+        if processed.data is not None:
+            contents = processed.data
+        else:
+            await file.seek(0)
+            contents = await file.read()
+
+        analysis_result = await analyze_image(contents, processed.mime_type)
         
         if not analysis_result.success:
             raise HTTPException(status_code=500, detail=analysis_result.error)
             
         return analysis_result
 
+    except CircuitOpenError as e:
+        # Gemini is failing: tell the client when to come back
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred during analysis: {str(e)}")
+
+
+@router.get("/analyze/quota")
+async def get_gemini_quota():
+    """
+    Shared Gemini quota scheduler: budget left, 429 pauses, and queue
+    depth / wait times per priority class (interactive, bulk, insights).
+    """
+    return client.quota.stats()
+
+
+@router.get("/analyze/circuits")
+async def get_gemini_circuits():
+    """
+    Gemini circuit breakers for the analysis and insights paths: state,
+    recent failure rate, trips and calls rejected while open.
+    """
+    return client.circuit_stats()
+
+
+@router.get("/analyze/backend")
+async def get_llm_backend():
+    """
+    The model backend behind the Gemini client (LLM_BACKEND) and its
+    counters; the fake backend reports injected failures and latency.
+    """
+    return client.backend.stats()
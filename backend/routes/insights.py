@@ -6,55 +6,100 @@ Four endpoints that leverage Gemini to produce analytics:
   GET /api/insights/trends         — trend analysis
   GET /api/insights/recommendations — prioritised fix list
   GET /api/insights/jurisdictions  — jurisdiction scorecards
+  GET /api/insights/all            — all four, streamed as NDJSON
+
+Insights are cached per report-store version; a stale insight is served
+instantly while one background refresh regenerates it. When Gemini fails,
+the last good insight is served. With none available, a 503 with
+Retry-After comes back straight away while the insights circuit is open.
 """
 
+import math
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from store import reports
+from services.circuit_breaker import CircuitOpenError
+from services.json_codec import dumps
 from services.insights_service import (
+    generate_all,
     generate_summary,
     generate_trends,
     generate_recommendations,
     generate_jurisdiction_scores,
+    cache_stats,
     clear_cache,
 )
 
 router = APIRouter(prefix="/api/insights", tags=["insights"])
 
 
+def _generation_failed(e: Exception) -> HTTPException:
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    return HTTPException(status_code=500, detail=f"Insight generation failed: {e}")
+
+
 @router.get("/summary")
 async def get_summary():
     """Gemini-generated executive summary of all reports."""
     try:
-        return generate_summary(reports)
+        return await generate_summary(reports)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Insight generation failed: {e}")
+        raise _generation_failed(e)
 
 
 @router.get("/trends")
 async def get_trends():
     """Gemini-generated trend analysis."""
     try:
-        return generate_trends(reports)
+        return await generate_trends(reports)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Insight generation failed: {e}")
+        raise _generation_failed(e)
 
 
 @router.get("/recommendations")
 async def get_recommendations():
     """Gemini-generated priority fix recommendations."""
     try:
-        return generate_recommendations(reports)
+        return await generate_recommendations(reports)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Insight generation failed: {e}")
+        raise _generation_failed(e)
 
 
 @router.get("/jurisdictions")
 async def get_jurisdictions():
     """Gemini-generated jurisdiction performance scorecards."""
     try:
-        return generate_jurisdiction_scores(reports)
+        return await generate_jurisdiction_scores(reports)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Insight generation failed: {e}")
+        raise _generation_failed(e)
+
+
+@router.get("/all")
+async def get_all():
+    """
+    All four insights in one request. The data summary is built once and the
+    Gemini prompts run concurrently; each section is streamed back as an
+    NDJSON line the moment it is ready:
+      {"section": "trends", "data": {...}}
+      {"section": "summary", "error": "..."}
+    """
+
+    async def lines():
+        async for section, data, error in generate_all(reports):
+            item = {"section": section}
+            if error is None:
+                item["data"] = data
+            else:
+                item["error"] = error
+            yield dumps(item) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.post("/clear-cache")
@@ -62,3 +107,9 @@ async def post_clear_cache():
     """Force clear the insights cache so the next call re-queries Gemini."""
     clear_cache()
     return {"status": "cache cleared"}
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Insight cache hit / miss / stale-served counters."""
+    return cache_stats()
@@ -0,0 +1,109 @@
+"""
+Prometheus metrics endpoint.
+
+GET /metrics renders the shared registry (services/metrics) in the
+Prometheus text format. Request and Gemini call metrics are recorded as
+they happen, by MetricsMiddleware and the Gemini client. The collectors
+registered here read state other components already keep (store size,
+image blobs, analysis queue, quota, circuits, insight cache) when the
+endpoint is scraped, so none of it costs anything between scrapes.
+"""
+
+import asyncio
+
+from fastapi import APIRouter, Response
+from services.analysis_worker import analysis_workers
+from services.blob_store import blobs
+from services.gemini_client import client
+from services.insights_service import cache_stats
+from services.metrics import CONTENT_TYPE, registry
+from store import reports
+
+router = APIRouter(tags=["metrics"])
+
+STATUSES = ("Reported", "Analyzed", "In Progress", "Finished")
+
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+# ── Collectors ───────────────────────────────────────────────────────────────
+
+registry.callback(
+    "potsoft_reports",
+    "Reports in the store by status.",
+    lambda: {(status,): reports.count(status=status) for status in STATUSES},
+    ("status",),
+)
+registry.callback(
+    "potsoft_image_blobs",
+    "Image blobs held in the blob store.",
+    lambda: {(): blobs.usage()[0]},
+)
+registry.callback(
+    "potsoft_image_bytes",
+    "Bytes of image blobs held in the blob store.",
+    lambda: {(): blobs.usage()[1]},
+)
+registry.callback(
+    "potsoft_analysis_queue_depth",
+    "Reports waiting for background analysis.",
+    lambda: {(): analysis_workers.stats()["queued"]},
+)
+registry.callback(
+    "potsoft_gemini_in_flight",
+    "Gemini calls holding a quota permit.",
+    lambda: {(): client.quota.in_flight},
+)
+registry.callback(
+    "potsoft_gemini_quota_queued",
+    "Gemini calls waiting for quota, by priority class.",
+    lambda: {
+        (name,): c["queued"] for name, c in client.quota.stats()["classes"].items()
+    },
+    ("priority",),
+)
+registry.callback(
+    "potsoft_gemini_throttled_total",
+    "429s that paused all Gemini dispatch.",
+    lambda: {(): client.quota.throttled},
+    type="counter",
+)
+registry.callback(
+    "potsoft_gemini_circuit_state",
+    "Gemini circuit state per caller: 0 closed, 1 half-open, 2 open.",
+    lambda: {
+        (name,): _CIRCUIT_STATES[breaker.state]
+        for name, breaker in client.circuits.items()
+    },
+    ("caller",),
+)
+registry.callback(
+    "potsoft_insights_cache_total",
+    "Insight cache lookups by result (hit, miss, stale, fallback).",
+    lambda: {
+        (result,): cache_stats()[key]
+        for result, key in (
+            ("hit", "hits"),
+            ("miss", "misses"),
+            ("stale", "stale"),
+            ("fallback", "fallbacks"),
+        )
+    },
+    ("result",),
+    type="counter",
+)
+registry.callback(
+    "potsoft_insights_cache_entries",
+    "Insights currently cached.",
+    lambda: {(): cache_stats()["entries"]},
+)
+
+
+# ── GET /metrics ─────────────────────────────────────────────────────────────
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    if not blobs.usage_known:
+        # The first scrape walks the blob store once
+        await asyncio.to_thread(blobs.usage)
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,29 +1,347 @@
 """
 Reports API routes: GET, POST, PATCH
-Prototype — in-memory store, no auth.
+Reports live in the REPORT_STORE (SQLite by default, in-memory optional); no auth.
+Images live in the content-addressed blob store; reports only carry a URL.
+New submissions are analysed in the background (services/analysis_worker).
 """
 
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException
+from fastapi import (
+    APIRouter,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from schemas.response_model import PotholeReportModel, StatusUpdateRequest
-from services.gemini_service import analyze_image, parse_gemini_response
+from services.analysis_cache import analysis_cache
+from services.analysis_worker import analysis_workers
+from services.blob_store import blobs
+from services.change_feed import change_feed_for
+from services.clustering import GRID_MAX_ZOOM, MAX_ZOOM, clusters_for
+from services.image_preprocess import preprocessor
+from services.json_codec import FastJSONResponse, dumps
 from services.jurisdiction import resolve_jurisdiction
-from store import reports, next_id
+from services.report_ingest import ArchiveError, import_archive, new_report
+from services.report_json import PUBLIC_FIELDS, report_json_for
+from services.report_revisions import revisions_for
+from store import reports
+import asyncio
 import base64
 from datetime import datetime, timezone
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
 
+MAX_PAGE_SIZE = 1000
+
+# Created at import so events, revisions and cached encodings are tracked
+# before the first client connects
+feed = change_feed_for(reports)
+revisions = revisions_for(reports)
+report_json = report_json_for(reports)
+
+
+def _encode_cursor(seq: int) -> str:
+    """Opaque cursor wrapping the store sequence number of the last item."""
+    return base64.urlsafe_b64encode(str(seq).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        seq = int(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor.")
+    if seq < 0:
+        raise HTTPException(status_code=422, detail="Invalid cursor.")
+    return seq
+
+
+def _parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail="bbox must be 'min_lng,min_lat,max_lng,max_lat'.",
+        )
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def _parse_fields(fields: str) -> tuple[str, ...]:
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in requested if f not in PUBLIC_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown field(s): {', '.join(unknown)}. "
+            f"Must be among: {', '.join(PUBLIC_FIELDS)}",
+        )
+    return requested
+
+
+def _as_utc(dt: datetime | None) -> datetime | None:
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (RFC 9110)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def _split_values(values: list[str] | None) -> set[str] | None:
+    """Accept both ?status=a&status=b and ?status=a,b."""
+    if not values:
+        return None
+    return {v.strip() for value in values for v in value.split(",") if v.strip()}
+
+
 # ── GET /api/reports ─────────────────────────────────────────────────────────
-@router.get("", response_model=list[PotholeReportModel])
-async def get_reports():
-    """Return all pothole reports."""
-    return reports
+@router.get(
+    "",
+    response_model=None,
+    responses={
+        200: {"model": list[PotholeReportModel]},
+        304: {"description": "Not modified since the If-None-Match ETag"},
+    },
+)
+async def get_reports(
+    status: list[str] | None = Query(None),
+    priority_color: list[str] | None = Query(None),
+    jurisdiction: list[str] | None = Query(None),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    bbox: str | None = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    fields: str | None = Query(None, description="Comma-separated field names"),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    since: str | None = Query(None, description="X-Store-Version of the last sync"),
+    if_none_match: str | None = Header(None),
+):
+    """
+    Return pothole reports, oldest first.
+
+    Filters are ANDed together; repeated or comma-separated values within a
+    filter are ORed. Without `limit` every matching report is returned. With
+    `limit`, the `X-Next-Cursor` response header carries the cursor for the
+    next page (absent on the last page).
+
+    The ETag is the store version, so a conditional request gets a 304 when
+    nothing was written since. With `since`, only the delta after that
+    version is returned, as {"version", "full", "reports", "deleted"}.
+
+    Store reports are already in response shape, so the body is encoded
+    straight from them without model validation. Without `fields`, each
+    report's JSON comes from the per-report cache (see report_json) and
+    only reports written since the last read are encoded again.
+    """
+    statuses = _split_values(status)
+    colors = _split_values(priority_color)
+    jurisdictions = _split_values(jurisdiction)
+    created_from = _as_utc(created_after)
+    created_to = _as_utc(created_before)
+    box = _parse_bbox(bbox) if bbox else None
+    keys = _parse_fields(fields) if fields else PUBLIC_FIELDS
+    after = _decode_cursor(cursor) if cursor else -1
+    if since is not None and (limit is not None or cursor):
+        raise HTTPException(
+            status_code=422, detail="since cannot be combined with limit or cursor."
+        )
+
+    # Every write bumps the version, so it validates any view of the store
+    version = reports.version_token()
+    etag = f'W/"{version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        # Resume point for GET /api/reports/events and for `since`
+        "X-Store-Version": version,
+    }
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    def in_view(r: dict) -> bool:
+        """Filters the indexed query can't apply (bbox, creation time)."""
+        if box is not None and not (
+            box[0] <= r["user_long"] <= box[2] and box[1] <= r["user_lat"] <= box[3]
+        ):
+            return False
+        if created_from is not None or created_to is not None:
+            ts = datetime.fromisoformat(r["timestamp"])
+            if (created_from is not None and ts < created_from) or (
+                created_to is not None and ts >= created_to
+            ):
+                return False
+        return True
+
+    def encode(items: list[dict]) -> bytes:
+        if keys is PUBLIC_FIELDS:
+            return report_json.encode_list(items)
+        return dumps([{k: r[k] for k in keys if k in r} for r in items])
+
+    delta = None
+    if since is not None:
+        since_version = reports.parse_version_token(since)
+        if since_version is not None:
+            delta = revisions.changed_since(since_version)
+
+    if delta is not None:
+        changed_ids, deleted = delta
+        changed = []
+        for report_id in changed_ids:
+            r = reports.get(report_id)
+            if r is None:
+                continue
+            # A report that moved out of the filtered view is gone for
+            # this client, just like a deleted one
+            if (
+                (statuses is None or r.get("status") in statuses)
+                and (colors is None or r.get("priority_color") in colors)
+                and (jurisdictions is None or r.get("jurisdiction") in jurisdictions)
+                and in_view(r)
+            ):
+                changed.append(r)
+            else:
+                deleted.append(report_id)
+        return _json(_delta_body(version, False, encode(changed), deleted), headers)
+
+    page = []
+    last_seq = None
+    has_more = False
+    matches = reports.query(
+        status=statuses,
+        priority_color=colors,
+        jurisdiction=jurisdictions,
+        after=after,
+    )
+    for seq, r in matches:
+        if not in_view(r):
+            continue
+        if limit is not None and len(page) == limit:
+            has_more = True
+            break
+        page.append(r)
+        last_seq = seq
+
+    if has_more:
+        headers["X-Next-Cursor"] = _encode_cursor(last_seq)
+    if since is not None:
+        # The delta can't be built (another run, or too old): send it all
+        return _json(_delta_body(version, True, encode(page), []), headers)
+    return _json(encode(page), headers)
+
+
+def _json(body: bytes, headers: dict[str, str]) -> Response:
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _delta_body(version: str, full: bool, reports_json: bytes, deleted: list) -> bytes:
+    """{"version", "full", "reports", "deleted"} around an encoded list."""
+    return b"".join(
+        (
+            b'{"version":',
+            dumps(version),
+            b',"full":',
+            dumps(full),
+            b',"reports":',
+            reports_json,
+            b',"deleted":',
+            dumps(deleted),
+            b"}",
+        )
+    )
+
+
+# ── GET /api/reports/clusters ────────────────────────────────────────────────
+@router.get("/clusters")
+async def get_report_clusters(
+    zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+    bbox: str | None = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+):
+    """
+    Map clusters for the visible viewport at a zoom level: centroid, report
+    count and priority breakdown per grid cell. Maintained incrementally on
+    every write, so the cost scales with the viewport, not the report count.
+    The index is built in a worker thread on the first request. Above zoom
+    GRID_MAX_ZOOM clusters are bucketed from the points under `bbox`, which
+    is then required.
+    """
+    if zoom > GRID_MAX_ZOOM and not bbox:
+        raise HTTPException(
+            status_code=422, detail=f"bbox is required above zoom {GRID_MAX_ZOOM}."
+        )
+    clusters = clusters_for(reports)
+    await clusters.ready()
+    return FastJSONResponse(
+        clusters.clusters(zoom, _parse_bbox(bbox) if bbox else None)
+    )
+
+
+# ── GET /api/reports/events ──────────────────────────────────────────────────
+@router.get("/events")
+async def stream_report_events(
+    jurisdiction: list[str] | None = Query(None),
+    since: str | None = Query(None, description="Event id / X-Store-Version"),
+    last_event_id: str | None = Header(None),
+):
+    """
+    Server-Sent Events stream of report changes: created, status_changed,
+    updated and deleted. Optionally limited to some jurisdictions. Clients
+    resume with the Last-Event-ID header (sent automatically by
+    EventSource) or `since`; if the gap can't be replayed a "reset" event
+    tells them to reload the list.
+    """
+
+    async def events():
+        yield "retry: 3000\n\n"
+        async for entry in feed.listen(
+            last_event_id or since, _split_values(jurisdiction)
+        ):
+            if entry is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield (
+                f"id: {feed.event_id(entry['seq'])}\n"
+                f"event: {entry['event']}\n"
+                f"data: {dumps(entry['data']).decode()}\n\n"
+            )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ── GET /api/reports/analysis-cache-stats ───────────────────────────────────
+@router.get("/analysis-cache-stats")
+async def get_analysis_cache_stats():
+    """Perceptual-hash analysis cache hit / miss counters."""
+    return analysis_cache.stats()
+
+
+# ── GET /api/reports/analysis-queue ─────────────────────────────────────────
+@router.get("/analysis-queue")
+async def get_analysis_queue():
+    """Background analysis backlog and worker counters."""
+    return analysis_workers.stats()
 
 
 # ── POST /api/reports ────────────────────────────────────────────────────────
-@router.post("", response_model=PotholeReportModel, status_code=201)
+@router.post("", response_model=PotholeReportModel, status_code=202)
 async def create_report(
+    response: Response,
     lat: float = Form(...),
     long: float = Form(...),
     image: UploadFile = File(...),
@@ -31,58 +349,98 @@ async def create_report(
     """
     Submit a new pothole report.
     1. Accept image + GPS coords
-    2. Send image to Gemini for analysis
-    3. Build structured report and store it
+    2. Downscale / normalise the image straight from the spooled upload
+       (X-Image-Bytes-Saved reports the gain; MAX_UPLOAD_BYTES caps the size)
+    3. Store the report as "Reported" and queue it for analysis
+    4. A background worker fills in the Gemini analysis and moves the report
+       to "Analyzed"
     """
-    # Read and encode image
-    contents = await image.read()
-    image_b64 = base64.b64encode(contents).decode("utf-8")
-    mime_type = image.content_type or "image/jpeg"
-
-    # Store image as data URI in the report (prototype — no cloud bucket)
-    image_data_uri = f"data:{mime_type};base64,{image_b64}"
-
-    # Call Gemini
-    gemini_result = analyze_image(image_b64, mime_type, lat=lat, lng=long)
+    # Preprocess the image from its spooled temp file, never reading it whole
+    mime_type = image.content_type or ""
+    if not mime_type.startswith("image/"):
+        mime_type = "image/jpeg"
+    processed = await preprocessor.process(image.file, mime_type)
+    response.headers["X-Image-Bytes-Saved"] = str(processed.bytes_saved)
 
-    if gemini_result.success and gemini_result.analysis:
-        analysis = parse_gemini_response(gemini_result.analysis)
+    # Write the image once to the blob store; the report only keeps its hash
+    if processed.data is not None:
+        image_sha256 = await asyncio.to_thread(blobs.put, processed.data)
     else:
-        # Fallback defaults if Gemini fails — still create the report
-        analysis = {
-            "is_pothole": False,
-            "size_category": "Small",
-            "priority_color": "Green",
-            "estimated_duration": "4 hours",
-            "jurisdiction": "Unknown",
-        }
-
-    # Always resolve jurisdiction from coordinates (more reliable than Gemini)
-    jurisdiction = resolve_jurisdiction(lat, long)
-    analysis["jurisdiction"] = jurisdiction
-
-    now_iso = datetime.now(timezone.utc).isoformat()
-    report = {
-        "id": next_id(),
-        "user_lat": lat,
-        "user_long": long,
-        "image_file": image_data_uri,
-        "timestamp": now_iso,
-        "is_pothole": analysis["is_pothole"],
-        "size_category": analysis["size_category"],
-        "priority_color": analysis["priority_color"],
-        "jurisdiction": analysis["jurisdiction"],
-        "estimated_duration": analysis["estimated_duration"],
-        "status": "Analyzed",
-        "status_history": [
-            {"status": "Analyzed", "at": now_iso},
-        ],
-    }
+        image.file.seek(0)
+        image_sha256 = await asyncio.to_thread(blobs.put_stream, image.file)
 
-    reports.append(report)
+    report = new_report(
+        lat, long, processed, image_sha256, resolve_jurisdiction(lat, long)
+    )
+    reports.add(report)
+    analysis_workers.enqueue(report["id"])
     return report
 
 
+# ── POST /api/reports/bulk ───────────────────────────────────────────────────
+@router.post("/bulk")
+async def bulk_import_reports(
+    archive: UploadFile = File(..., description="zip or tar of images"),
+    manifest: UploadFile | None = File(
+        None, description="NDJSON: one {file, lat, long} per line"
+    ),
+    wait: bool = Form(False),
+):
+    """
+    Import many geotagged images in one request (dashcam / survey feeds).
+
+    The manifest can be uploaded alongside the archive or stored inside it
+    as manifest.ndjson. The response is an NDJSON stream with one line per
+    item as it is stored and queued for analysis. With `wait`, a second
+    line per item carries its analysis once complete. A final "done" line
+    ends the stream.
+    """
+    results = import_archive(
+        reports, archive.file, manifest.file if manifest else None, wait=wait
+    )
+    try:
+        first = await anext(results)
+    except ArchiveError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    async def lines():
+        yield dumps(first) + b"\n"
+        async for result in results:
+            yield dumps(result) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# ── GET /api/reports/{report_id}/image ───────────────────────────────────────
+@router.get("/{report_id}/image")
+async def get_report_image(report_id: str):
+    """Stream the image attached to a report from the blob store."""
+    report = reports.get(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Report {report_id} not found.")
+
+    digest = report.get("image_sha256")
+    if not digest:
+        # Seed reports point at an external placeholder image
+        if report.get("image_file", "").startswith(("http://", "https://")):
+            return RedirectResponse(report["image_file"])
+        raise HTTPException(status_code=404, detail="Report has no stored image.")
+
+    path = blobs.path_for(digest)
+    if not blobs.exists(digest):
+        raise HTTPException(status_code=404, detail="Image blob is missing.")
+
+    # Blobs are immutable, so clients and proxies may cache them forever
+    return FileResponse(
+        path,
+        media_type=report.get("image_mime", "image/jpeg"),
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{digest}"',
+        },
+    )
+
+
 # ── PATCH /api/reports/{report_id}/status ────────────────────────────────────
 @router.patch("/{report_id}/status", response_model=PotholeReportModel)
 async def update_report_status(report_id: str, body: StatusUpdateRequest):
@@ -94,18 +452,8 @@ async def update_report_status(report_id: str, body: StatusUpdateRequest):
             detail=f"Invalid status. Must be one of: {', '.join(sorted(allowed))}",
         )
 
-    for report in reports:
-        if report["id"] == report_id:
-            report["status"] = body.status
-            # Append to status history for analytics tracking
-            if "status_history" not in report:
-                report["status_history"] = []
-            report["status_history"].append(
-                {
-                    "status": body.status,
-                    "at": datetime.now(timezone.utc).isoformat(),
-                }
-            )
-            return report
-
-    raise HTTPException(status_code=404, detail=f"Report {report_id} not found.")
+    # The store appends to status_history for analytics tracking
+    report = reports.set_status(report_id, body.status)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Report {report_id} not found.")
+    return report
@@ -0,0 +1,114 @@
+"""
+Analysis cache for repeat and near-duplicate photos.
+
+Citizens often resubmit a photo, or send several shots of one pothole. Each
+parsed Gemini analysis is kept under the photo's 64-bit perceptual hash
+(dHash, see image_preprocess) and a coarse location cell about
+ANALYSIS_CACHE_CELL_DEG wide. A new upload reuses a cached analysis when a
+photo taken in the same or a neighbouring cell is within
+ANALYSIS_CACHE_MAX_DISTANCE differing hash bits.
+
+Entries are evicted least-recently-used beyond ANALYSIS_CACHE_SIZE and
+expire ANALYSIS_CACHE_TTL_SECONDS after they were stored.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "10000"))
+ANALYSIS_CACHE_TTL_SECONDS = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+ANALYSIS_CACHE_MAX_DISTANCE = int(os.getenv("ANALYSIS_CACHE_MAX_DISTANCE", "6"))
+ANALYSIS_CACHE_CELL_DEG = float(os.getenv("ANALYSIS_CACHE_CELL_DEG", "0.001"))
+
+_Key = tuple[tuple[int, int], int]  # (cell, dhash)
+
+
+class AnalysisCache:
+    """LRU + TTL cache of parsed analyses keyed by (location cell, dHash)."""
+
+    def __init__(
+        self,
+        max_entries: int = ANALYSIS_CACHE_SIZE,
+        ttl: float = ANALYSIS_CACHE_TTL_SECONDS,
+        max_distance: int = ANALYSIS_CACHE_MAX_DISTANCE,
+        cell_deg: float = ANALYSIS_CACHE_CELL_DEG,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.cell_deg = cell_deg
+        # key -> (stored_at, analysis); order is least to most recently used
+        self._entries: OrderedDict[_Key, tuple[float, dict]] = OrderedDict()
+        # cell -> hashes stored there, for the similarity scan
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _remove(self, key: _Key) -> None:
+        del self._entries[key]
+        cell, dhash = key
+        hashes = self._cells[cell]
+        hashes.discard(dhash)
+        if not hashes:
+            del self._cells[cell]
+
+    def _find(self, cell: tuple[int, int], dhash: int, now: float) -> _Key | None:
+        if (cell, dhash) in self._entries:
+            candidates = [(cell, dhash)]  # exact resubmission
+        else:
+            i, j = cell
+            candidates = [
+                ((i + di, j + dj), h)
+                for di in (-1, 0, 1)
+                for dj in (-1, 0, 1)
+                for h in self._cells.get((i + di, j + dj), ())
+                if (h ^ dhash).bit_count() <= self.max_distance
+            ]
+        live = []
+        for key in candidates:
+            if now - self._entries[key][0] > self.ttl:
+                self._remove(key)
+            else:
+                live.append(key)
+        return min(live, key=lambda k: (k[1] ^ dhash).bit_count(), default=None)
+
+    def get(self, dhash: int | None, lat: float, lng: float) -> dict | None:
+        """A copy of the cached analysis for a matching photo, or None."""
+        if dhash is None:
+            self.misses += 1
+            return None
+        key = self._find(self._cell(lat, lng), dhash, time.time())
+        if key is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return dict(self._entries[key][1])
+
+    def put(self, dhash: int | None, lat: float, lng: float, analysis: dict) -> None:
+        if dhash is None:
+            return
+        cell = self._cell(lat, lng)
+        key = (cell, dhash)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (time.time(), dict(analysis))
+        self._cells.setdefault(cell, set()).add(dhash)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._cells.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# Shared instance used by the report routes
+analysis_cache = AnalysisCache()
@@ -0,0 +1,279 @@
+"""
+Background analysis of submitted reports.
+
+POST /api/reports stores a report as "Reported" with `analysis_pending` set
+and enqueues its id here, so submission latency does not depend on Gemini.
+ANALYSIS_WORKERS asyncio tasks drain the queue: each reuses a cached
+analysis or asks Gemini, then fills in the analysis fields and moves the
+report to "Analyzed" in a single store update. Bursts wait in the queue,
+and the shared Gemini client still caps the number of calls in flight.
+When reports are queued up, a worker takes up to ANALYSIS_BATCH_SIZE at a
+time and sends them to Gemini in one multi-image request. That spreads the
+prompt and request overhead across the batch. A lone submission still gets
+an immediate single-image call.
+
+If Gemini fails, or its circuit breaker is open during an outage, the
+report gets DEFAULT_ANALYSIS at once instead of waiting on the provider.
+So does a report whose image blob can't be read; the rest of its batch
+goes ahead.
+
+`enqueue` returns a future resolved with the analysed report (None if the
+report vanished or analysis failed) for callers that want to wait, such as
+the bulk import stream. Jobs carry a Gemini quota class (gemini_quota).
+The queue hands out INTERACTIVE submissions before BULK work, and a batch
+asks Gemini at the best class among its jobs. On start, reports that are
+still "Reported" and pending (queued or half-done when the server last
+stopped) are enqueued again as BULK.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+from datetime import datetime, timezone
+
+from services.analysis_cache import analysis_cache
+from services.blob_store import blobs
+from services.circuit_breaker import CircuitOpenError
+from services.gemini_quota import Priority
+from services.gemini_service import (
+    analyze_image,
+    analyze_images,
+    parse_gemini_response,
+)
+from store import ReportStore, reports
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "8"))
+# Max reports one worker packs into a single Gemini request (1 disables)
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "8"))
+
+# Placeholder analysis stored with a new report, and the fallback used if
+# Gemini fails, so the report is still created and moved on
+DEFAULT_ANALYSIS = {
+    "is_pothole": False,
+    "size_category": "Small",
+    "priority_color": "Green",
+    "estimated_duration": "4 hours",
+    "jurisdiction": "Unknown",
+}
+
+ANALYSIS_FIELDS = ("is_pothole", "size_category", "priority_color", "estimated_duration")
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisWorkers:
+    """A queue of report ids and the asyncio tasks that analyse them."""
+
+    def __init__(
+        self,
+        store: ReportStore,
+        workers: int = ANALYSIS_WORKERS,
+        batch_size: int = ANALYSIS_BATCH_SIZE,
+    ):
+        self._store = store
+        self._workers = workers
+        self._batch_size = max(1, batch_size)
+        # (priority, arrival, report id, future): best class first, then FIFO
+        self._queue: asyncio.PriorityQueue | None = None
+        self._order = itertools.count()
+        self._tasks: list[asyncio.Task] = []
+        self.analyzed = 0
+        self.failed = 0
+        self.batches = 0
+        self.batch_fallbacks = 0  # batched images retried on their own
+        self.defaulted = 0  # Gemini failed or its circuit was open
+
+    def start(self) -> None:
+        """Start the workers on the running loop and requeue pending reports."""
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"analysis-worker-{i}")
+            for i in range(self._workers)
+        ]
+        for _, report in self._store.query(status="Reported"):
+            if report.get("analysis_pending"):
+                self.enqueue(report["id"], Priority.BULK)
+
+    async def stop(self) -> None:
+        """Cancel the workers. Unfinished reports stay pending for next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(
+        self, report_id: str, priority: Priority = Priority.INTERACTIVE
+    ) -> asyncio.Future:
+        """Queue a report; the future resolves once its analysis is stored."""
+        if self._queue is None:
+            raise RuntimeError("Analysis workers are not running.")
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._order), report_id, done))
+        return done
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "analyzed": self.analyzed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "batch_fallbacks": self.batch_fallbacks,
+            "defaulted": self.defaulted,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            jobs = [await self._queue.get()]
+            # Under a backlog (bulk imports, restarts) take several reports
+            # at once so they share one batched Gemini request
+            while len(jobs) < self._batch_size and not self._queue.empty():
+                jobs.append(self._queue.get_nowait())
+            report_ids = [report_id for _, _, report_id, _ in jobs]
+            results: list[dict | None] = [None] * len(jobs)
+            try:
+                # The queue is ordered, so the first job has the best class
+                results = await self.analyze_many(report_ids, jobs[0][0])
+            except Exception:
+                self.failed += len(jobs)
+                logger.exception("Analysis of reports %s failed", report_ids)
+            finally:
+                for (*_, done), result in zip(jobs, results):
+                    if not done.done():
+                        done.set_result(result)
+                    self._queue.task_done()
+
+    async def analyze(
+        self, report_id: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict | None:
+        """Analyse one pending report, store and return the updated report."""
+        return (await self.analyze_many([report_id], priority))[0]
+
+    async def analyze_many(
+        self, report_ids: list[str], priority: Priority = Priority.INTERACTIVE
+    ) -> list[dict | None]:
+        """
+        Analyse pending reports and store the results; returns the updated
+        reports in order. Cached analyses are reused. Two or more remaining
+        images go to Gemini in one batched request, and any image the batch
+        did not answer cleanly is retried with a single-image call. Gemini
+        calls wait for quota in the `priority` class.
+        """
+        found = [self._store.get(report_id) for report_id in report_ids]
+        pending = [r for r in found if r is not None and r.get("analysis_pending")]
+
+        analyses: dict[str, dict] = {}
+        misses = []
+        for report in pending:
+            cached = analysis_cache.get(
+                report.get("image_dhash"), report["user_lat"], report["user_long"]
+            )
+            if cached is not None:
+                analyses[report["id"]] = cached
+            else:
+                misses.append(report)
+
+        if misses:
+            images = await asyncio.to_thread(_read_images, misses)
+            # A report whose image is gone still gets an analysis and leaves
+            # the pending state, so it is not retried on every restart
+            for report, image in zip(misses, images):
+                if image is None:
+                    self.defaulted += 1
+                    analyses[report["id"]] = DEFAULT_ANALYSIS
+            misses, images = (
+                [r for r, image in zip(misses, images) if image is not None],
+                [image for image in images if image is not None],
+            )
+
+        if misses:
+            batched: list[dict | None] = [None] * len(misses)
+            if len(misses) > 1:
+                batched = await analyze_images(images, priority)
+                self.batches += 1
+                self.batch_fallbacks += batched.count(None)
+                for report, analysis in zip(misses, batched):
+                    if analysis is not None:
+                        _cache_put(report, analysis)
+                        analyses[report["id"]] = analysis
+
+            retry = [
+                (report, image)
+                for report, image, analysis in zip(misses, images, batched)
+                if analysis is None
+            ]
+            singles = await asyncio.gather(
+                *(
+                    self._analyze_single(report, image, priority)
+                    for report, image in retry
+                )
+            )
+            for (report, _), analysis in zip(retry, singles):
+                analyses[report["id"]] = analysis
+
+        return [
+            self._store_analysis(report["id"], analyses[report["id"]])
+            if report is not None and report["id"] in analyses
+            else report
+            for report in found
+        ]
+
+    async def _analyze_single(
+        self, report: dict, image: tuple[bytes, str], priority: Priority
+    ) -> dict:
+        try:
+            gemini_result = await analyze_image(
+                *image, lat=report["user_lat"], lng=report["user_long"], priority=priority
+            )
+        except CircuitOpenError:
+            self.defaulted += 1
+            return DEFAULT_ANALYSIS
+        if gemini_result.success and gemini_result.analysis:
+            analysis = parse_gemini_response(gemini_result.analysis)
+            _cache_put(report, analysis)
+            return analysis
+        self.defaulted += 1
+        return DEFAULT_ANALYSIS
+
+    def _store_analysis(self, report_id: str, analysis: dict) -> dict | None:
+        # Re-read: the report may have been updated while Gemini was working
+        current = self._store.get(report_id)
+        if current is None:
+            return None
+        changes = {field: analysis[field] for field in ANALYSIS_FIELDS}
+        changes["analysis_pending"] = False
+        if current.get("status") == "Reported":
+            history = list(current.get("status_history", []))
+            history.append(
+                {"status": "Analyzed", "at": datetime.now(timezone.utc).isoformat()}
+            )
+            changes["status"] = "Analyzed"
+            changes["status_history"] = history
+        updated = self._store.update(report_id, **changes)
+        self.analyzed += 1
+        return updated
+
+
+def _read_images(reports: list[dict]) -> list[tuple[bytes, str] | None]:
+    """(image bytes, mime type) per report; None where it can't be read."""
+    images = []
+    for r in reports:
+        try:
+            images.append(
+                (blobs.read(r["image_sha256"]), r.get("image_mime", "image/jpeg"))
+            )
+        except (KeyError, OSError):
+            logger.warning("Image of report %s is unreadable", r["id"], exc_info=True)
+            images.append(None)
+    return images
+
+
+def _cache_put(report: dict, analysis: dict) -> None:
+    analysis_cache.put(
+        report.get("image_dhash"), report["user_lat"], report["user_long"], analysis
+    )
+
+
+# Shared workers, started and stopped by the app lifespan in main.py
+analysis_workers = AnalysisWorkers(reports)
@@ -0,0 +1,133 @@
+"""
+Content-addressed on-disk image store.
+
+Uploaded images are written once under IMAGE_STORE_DIR, keyed by the
+SHA-256 of their bytes, so a report only needs to carry a short URL and
+identical uploads share a single file. Layout: <root>/<hash[:2]>/<hash>.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from typing import BinaryIO
+
+IMAGE_STORE_DIR = os.getenv(
+    "IMAGE_STORE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "data", "images"),
+)
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """Write-once blob storage addressed by SHA-256 hex digest."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()  # blobs are written from worker threads
+        self._usage: list[int] | None = None  # [blobs, bytes] once scanned
+
+    def path_for(self, digest: str) -> str:
+        """Filesystem path of a blob. Rejects anything that is not a digest."""
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest))
+
+    def put(self, data: bytes) -> str:
+        """Store `data` (no-op if already present) and return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return digest
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temp file then rename, so readers never see partial blobs
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._added(len(data))
+        return digest
+
+    def put_stream(self, source: BinaryIO) -> str:
+        """
+        Store the contents of a file object chunk by chunk, hashing as it
+        goes, and return the digest. Memory use is one chunk whatever the size.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while chunk := source.read(_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            path = self.path_for(digest)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                self._added(size)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        with open(self.path_for(digest), "rb") as f:
+            return f.read()
+
+    @property
+    def usage_known(self) -> bool:
+        return self._usage is not None
+
+    def usage(self) -> tuple[int, int]:
+        """
+        (blob count, total bytes). The first call walks the store, so make
+        it off the event loop; after that the totals are kept up to date as
+        blobs are added.
+        """
+        with self._lock:
+            if self._usage is not None:
+                return self._usage[0], self._usage[1]
+        count = size = 0
+        if os.path.isdir(self.root):
+            for shard in os.scandir(self.root):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if _DIGEST_RE.match(entry.name):
+                        count += 1
+                        size += entry.stat().st_size
+        with self._lock:
+            if self._usage is None:
+                self._usage = [count, size]
+            return self._usage[0], self._usage[1]
+
+    def _added(self, size: int) -> None:
+        with self._lock:
+            if self._usage is not None:
+                self._usage[0] += 1
+                self._usage[1] += size
+
+
+# Shared instance used by the report routes
+blobs = BlobStore(IMAGE_STORE_DIR)
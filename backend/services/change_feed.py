@@ -0,0 +1,133 @@
+"""
+Live feed of report changes for push clients (Server-Sent Events).
+
+ChangeFeed subscribes to the store and turns each write into an event:
+"created", "status_changed" (status moved), "updated" (any other change,
+e.g. the analysis being filled in) or "deleted". Each event is numbered
+with the store version right after the write and tagged with the store
+epoch, so ids are "<epoch>:<version>".
+
+The last CHANGE_FEED_SIZE events are kept in a ring buffer. A client that
+reconnects with the id of the last event it saw gets everything after that
+from the buffer. If the gap is no longer buffered, or the server restarted
+(different epoch), it gets a single "reset" event and should reload.
+
+Each connected client has its own bounded queue. A client that falls
+CHANGE_FEED_CLIENT_QUEUE events behind is disconnected and can resume.
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Iterable
+
+from store import ReportStore
+
+CHANGE_FEED_SIZE = int(os.getenv("CHANGE_FEED_SIZE", "10000"))
+CHANGE_FEED_CLIENT_QUEUE = int(os.getenv("CHANGE_FEED_CLIENT_QUEUE", "1000"))
+
+# Report keys that are internal to the backend and never pushed
+_PRIVATE_FIELDS = ("image_sha256", "image_mime", "image_dhash", "analysis_pending")
+
+
+class _Subscriber:
+    __slots__ = ("queue", "jurisdictions", "overflowed")
+
+    def __init__(self, jurisdictions: set[str] | None):
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(CHANGE_FEED_CLIENT_QUEUE)
+        self.jurisdictions = jurisdictions
+        self.overflowed = False
+
+    def wants(self, event: dict) -> bool:
+        return self.jurisdictions is None or event["jurisdiction"] in self.jurisdictions
+
+
+class ChangeFeed:
+    """Ring buffer of recent change events plus live fan-out to subscribers."""
+
+    def __init__(self, store: ReportStore, size: int = CHANGE_FEED_SIZE):
+        self._store = store
+        self._events: deque[dict] = deque(maxlen=size)
+        self._subscribers: set[_Subscriber] = set()
+        store.subscribe(self._on_change)
+
+    def _on_change(self, event: str, report: dict, previous: dict | None) -> None:
+        if event == "updated" and previous and "status" in previous:
+            event = "status_changed"
+        if event == "deleted":
+            data = {"id": report["id"]}
+        else:
+            data = {k: v for k, v in report.items() if k not in _PRIVATE_FIELDS}
+        entry = {
+            "seq": self._store.version,
+            "event": event,
+            "jurisdiction": report.get("jurisdiction"),
+            "data": data,
+        }
+        self._events.append(entry)
+        for subscriber in list(self._subscribers):
+            if not subscriber.wants(entry):
+                continue
+            try:
+                subscriber.queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                self._subscribers.discard(subscriber)
+
+    def event_id(self, seq: int) -> str:
+        return self._store.version_token(seq)
+
+    async def listen(
+        self,
+        last_event_id: str | None = None,
+        jurisdictions: Iterable[str] | None = None,
+        heartbeat: float = 15.0,
+    ) -> AsyncIterator[dict | None]:
+        """
+        Yield events for one client: first the buffered ones after
+        `last_event_id` (or a "reset" event if they can't be replayed),
+        then live ones. Yields None every `heartbeat` seconds of silence.
+        """
+        subscriber = _Subscriber(set(jurisdictions) if jurisdictions else None)
+        # Replay and registration happen without an await in between, so
+        # no event can slip between the buffer and the live queue
+        backlog: list[dict] = []
+        if last_event_id is not None:
+            since = self._store.parse_version_token(last_event_id)
+            oldest = self._events[0]["seq"] if self._events else self._store.version + 1
+            if since is None or since > self._store.version or since < oldest - 1:
+                backlog.append(
+                    {
+                        "seq": self._store.version,
+                        "event": "reset",
+                        "jurisdiction": None,
+                        "data": {},
+                    }
+                )
+            else:
+                backlog.extend(
+                    e for e in self._events if e["seq"] > since and subscriber.wants(e)
+                )
+        self._subscribers.add(subscriber)
+        try:
+            for entry in backlog:
+                yield entry
+            while not subscriber.overflowed:
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+            # Too slow: drain what is queued, then end so the client resumes
+            while not subscriber.queue.empty():
+                yield subscriber.queue.get_nowait()
+        finally:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+
+def change_feed_for(store: ReportStore) -> ChangeFeed:
+    """The (lazily created) change feed attached to `store`."""
+    return store.listener("change_feed", ChangeFeed)
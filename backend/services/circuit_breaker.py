@@ -0,0 +1,151 @@
+"""
+Circuit breaker for calls to a remote dependency (Gemini).
+
+While the dependency is healthy the circuit is closed and every call goes
+through. Outcomes from the last GEMINI_BREAKER_WINDOW_SECONDS are kept. A
+call counts as failed if it errored, timed out, or took longer than
+GEMINI_BREAKER_SLOW_CALL_SECONDS. Once at least GEMINI_BREAKER_MIN_CALLS
+outcomes are in the window and the failed share reaches
+GEMINI_BREAKER_FAILURE_RATE, the circuit opens.
+
+An open circuit rejects calls at once with CircuitOpenError. Callers serve
+their fallback (default analysis, last good insight) instead of waiting
+for the dependency to fail. After GEMINI_BREAKER_OPEN_SECONDS the circuit
+is half-open: a single probe call is let through. A good probe closes the
+circuit; a failed or slow one opens it again.
+
+`allow` hands each admitted call a token that the caller passes back to
+`record` or `abandon`. Every state change starts a new token generation.
+Only outcomes of calls admitted in the current closed period count, and
+only the probe's own outcome settles the half-open state. A slow call from
+before a trip can't close the circuit when it finally returns.
+"""
+
+import os
+import time
+from collections import deque
+
+BREAKER_FAILURE_RATE = float(os.getenv("GEMINI_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_MIN_CALLS = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "5"))
+BREAKER_WINDOW_SECONDS = float(os.getenv("GEMINI_BREAKER_WINDOW_SECONDS", "60"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("GEMINI_BREAKER_SLOW_CALL_SECONDS", "20"))
+BREAKER_OPEN_SECONDS = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """A call was rejected without being made because its circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"{name} is unavailable (circuit open), retry in {retry_after:.0f}s"
+        )
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a sliding window of outcomes."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        min_calls: int = BREAKER_MIN_CALLS,
+        window: float = BREAKER_WINDOW_SECONDS,
+        slow_call: float = BREAKER_SLOW_CALL_SECONDS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()  # (time, failed)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._generation = 0  # token handed to calls admitted right now
+        self._probe: int | None = None  # token of the half-open probe
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> int:
+        """
+        Admit one call or raise CircuitOpenError. Every admitted call must
+        end in `record` or `abandon`, passing back the returned token.
+        """
+        if self.state == OPEN:
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probe is not None:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.slow_call)
+            self._generation += 1
+            self._probe = self._generation
+        return self._generation
+
+    def record(self, token: int, ok: bool, latency: float) -> None:
+        """Outcome of an admitted call; slow successes count as failures."""
+        failed = not ok or latency > self.slow_call
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            if token != self._probe:
+                return  # a call from before the circuit opened
+            self._probe = None
+            if failed:
+                self._trip(now)
+            else:
+                self.state = CLOSED
+                self._generation += 1
+                self._outcomes.clear()
+                self._failures = 0
+            return
+        if self.state != CLOSED or token != self._generation:
+            return  # a call that started before the circuit opened
+
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        self._prune(now)
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+            self._trip(now)
+
+    def abandon(self, token: int) -> None:
+        """An admitted call ended without a verdict (cancelled, rate limited)."""
+        if self.state == HALF_OPEN and token == self._probe:
+            self._probe = None
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._failures -= self._outcomes.popleft()[1]
+
+    def _trip(self, now: float) -> None:
+        self.state = OPEN
+        self._generation += 1
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self.trips += 1
+
+    def stats(self) -> dict:
+        self._prune(time.monotonic())
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failure_rate": round(self._failures / calls, 3) if calls else 0.0,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "open_for_seconds": round(
+                max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 1
+            )
+            if self.state == OPEN
+            else 0.0,
+        }
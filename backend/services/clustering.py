@@ -0,0 +1,278 @@
+"""
+Zoom-aware grid clustering of reports for the map.
+
+At zoom z the map is cut into square cells roughly CLUSTER_RADIUS_PX screen
+pixels wide (a zoom-z map is 256 * 2^z pixels across). Cells halve in size
+with each zoom level and share one origin, so every cell at z + 1 lies in
+exactly one cell at z.
+
+Grids are kept for the coarse zoom levels 0..GRID_MAX_ZOOM only. A cell
+holds its report count, coordinate sums for its centroid and one count per
+priority, in fixed slots of a plain list. The finest grid also lists the
+points in each cell. A finer zoom is answered by bucketing the points of the
+GRID_MAX_ZOOM cells under the viewport, which at those zooms is a small area.
+
+The index is built on first use in a worker thread: points and the finest
+grid first, then each coarser grid rolled up from the one below it. Writes
+made meanwhile are replayed once the build is done, and from then on the
+grids are updated from store change events, one cell per grid.
+"""
+
+import asyncio
+import math
+import os
+
+from store import ReportStore
+
+MAX_ZOOM = 20
+GRID_MAX_ZOOM = 12
+CLUSTER_RADIUS_PX = int(os.getenv("CLUSTER_RADIUS_PX", "60"))
+
+# Priority slots of a cell; anything else counts as the default, Green
+PRIORITIES = ("Green", "Yellow", "Red")
+_SLOT = {p: i for i, p in enumerate(PRIORITIES)}
+
+# Cell layout: [count, lat_sum, lng_sum, *per-priority counts]
+_COUNT, _LAT, _LNG, _FIRST_PRIORITY = 0, 1, 2, 3
+
+# Fields whose change moves a report between cells or priority slots
+_TRACKED_FIELDS = ("user_lat", "user_long", "priority_color")
+
+
+def cell_size_deg(zoom: int) -> float:
+    return 360.0 / (2**zoom) * CLUSTER_RADIUS_PX / 256
+
+
+def _point(r: dict) -> tuple[float, float, int] | None:
+    lat, lng = r.get("user_lat"), r.get("user_long")
+    if lat is None or lng is None:
+        return None
+    return lat, lng, _SLOT.get(r.get("priority_color", "Green"), 0)
+
+
+def _new_cell() -> list:
+    return [0, 0.0, 0.0] + [0] * len(PRIORITIES)
+
+
+class ReportClusters:
+    """Per-zoom grid clusters for one ReportStore."""
+
+    def __init__(self, store: ReportStore):
+        self._store = store
+        self._built = False
+        self._building: asyncio.Future | None = None
+        # Writes seen during the build: report id -> coordinates before each
+        self._touched: dict[str, set[tuple]] = {}
+        self._sizes = [cell_size_deg(z) for z in range(MAX_ZOOM + 1)]
+        self._grids: list[dict[tuple[int, int], list]] = []
+        # GRID_MAX_ZOOM cell -> {report id: (lat, lng, priority slot)}
+        self._points: dict[tuple[int, int], dict[str, tuple]] = {}
+        store.subscribe(self._on_change)
+
+    def _key(self, zoom: int, lat: float, lng: float) -> tuple[int, int]:
+        size = self._sizes[zoom]
+        return math.floor((lat + 90) / size), math.floor((lng + 180) / size)
+
+    # ── Build ──
+
+    async def ready(self) -> None:
+        """Build the index in a worker thread, once, if not built yet."""
+        if self._built:
+            return
+        if self._building is None:
+            self._building = asyncio.ensure_future(self._build())
+        await asyncio.shield(self._building)
+
+    async def _build(self) -> None:
+        try:
+            self._grids, self._points = await asyncio.to_thread(self._scan)
+        except BaseException:
+            self._building = None
+            self._touched.clear()
+            raise
+        self._built = True
+        # Replay the writes the scan may or may not have seen
+        touched, self._touched = self._touched, {}
+        for report_id, seen in touched.items():
+            report = self._store.get(report_id)
+            if report is not None:
+                seen.add((report.get("user_lat"), report.get("user_long")))
+            for lat, lng in seen:
+                self._remove(report_id, lat, lng)
+            if report is not None:
+                self._add(report_id, _point(report))
+
+    def _scan(self) -> tuple[list, dict]:
+        # Runs in a worker thread: only reads the store and builds new objects
+        points: dict[tuple[int, int], dict[str, tuple]] = {}
+        finest: dict[tuple[int, int], list] = {}
+        for report in self._store:
+            point = _point(report)
+            if point is None:
+                continue
+            lat, lng, slot = point
+            key = self._key(GRID_MAX_ZOOM, lat, lng)
+            points.setdefault(key, {})[report["id"]] = point
+            cell = finest.get(key)
+            if cell is None:
+                cell = finest[key] = _new_cell()
+            cell[_COUNT] += 1
+            cell[_LAT] += lat
+            cell[_LNG] += lng
+            cell[_FIRST_PRIORITY + slot] += 1
+
+        grids = [finest]
+        for _ in range(GRID_MAX_ZOOM):
+            coarser: dict[tuple[int, int], list] = {}
+            for (i, j), cell in grids[0].items():
+                parent = coarser.get((i >> 1, j >> 1))
+                if parent is None:
+                    coarser[(i >> 1, j >> 1)] = list(cell)
+                else:
+                    for slot, value in enumerate(cell):
+                        parent[slot] += value
+            grids.insert(0, coarser)
+        return grids, points
+
+    # ── Incremental updates ──
+
+    def _on_change(self, event: str, report: dict, previous: dict | None) -> None:
+        if previous and not any(f in previous for f in _TRACKED_FIELDS):
+            return
+        before = {**report, **previous} if previous else report
+        if not self._built:
+            if self._building is not None:
+                self._touched.setdefault(report["id"], set()).add(
+                    (before.get("user_lat"), before.get("user_long"))
+                )
+            return
+        report_id = report["id"]
+        if event != "created":
+            self._remove(report_id, before.get("user_lat"), before.get("user_long"))
+        if event != "deleted":
+            self._add(report_id, _point(report))
+
+    def _remove(self, report_id: str, lat: float | None, lng: float | None) -> None:
+        if lat is None or lng is None:
+            return
+        key = self._key(GRID_MAX_ZOOM, lat, lng)
+        members = self._points.get(key)
+        point = members.pop(report_id, None) if members else None
+        if point is None:
+            return
+        if not members:
+            del self._points[key]
+        self._update_cells(key, point, -1)
+
+    def _add(self, report_id: str, point: tuple | None) -> None:
+        if point is None:
+            return
+        key = self._key(GRID_MAX_ZOOM, point[0], point[1])
+        self._points.setdefault(key, {})[report_id] = point
+        self._update_cells(key, point, +1)
+
+    def _update_cells(self, finest: tuple[int, int], point: tuple, sign: int) -> None:
+        lat, lng, slot = point
+        i, j = finest
+        for shift, grid in enumerate(reversed(self._grids)):
+            key = (i >> shift, j >> shift)
+            cell = grid.get(key)
+            if cell is None:
+                cell = grid[key] = _new_cell()
+            cell[_COUNT] += sign
+            cell[_LAT] += sign * lat
+            cell[_LNG] += sign * lng
+            cell[_FIRST_PRIORITY + slot] += sign
+            if cell[_COUNT] <= 0:
+                del grid[key]
+
+    # ── Queries ──
+
+    def _keys_in(self, zoom: int, grid: dict, bbox) -> list[tuple[int, int]]:
+        """Occupied keys of `grid` (cells at `zoom`) intersecting `bbox`."""
+        if bbox is None:
+            return list(grid)
+        min_lng, min_lat, max_lng, max_lat = bbox
+        i0, j0 = self._key(zoom, min_lat, min_lng)
+        i1, j1 = self._key(zoom, max_lat, max_lng)
+        # Walk whichever is smaller: the viewport's cells or the occupied ones
+        if (i1 - i0 + 1) * (j1 - j0 + 1) <= len(grid):
+            return [
+                (i, j)
+                for i in range(i0, i1 + 1)
+                for j in range(j0, j1 + 1)
+                if (i, j) in grid
+            ]
+        return [(i, j) for i, j in grid if i0 <= i <= i1 and j0 <= j <= j1]
+
+    def _bucket_points(self, zoom: int, bbox) -> dict[tuple[int, int], list]:
+        """Cells at a zoom finer than the grids, from the points under `bbox`."""
+        min_lng, min_lat, max_lng, max_lat = bbox
+        i0, j0 = self._key(zoom, min_lat, min_lng)
+        i1, j1 = self._key(zoom, max_lat, max_lng)
+        size = self._sizes[zoom]
+        cells: dict[tuple[int, int], list] = {}
+        for key in self._keys_in(GRID_MAX_ZOOM, self._points, bbox):
+            for lat, lng, slot in self._points[key].values():
+                # Same cell as _key: both offsets are >= 0, so int() floors
+                i, j = int((lat + 90) / size), int((lng + 180) / size)
+                if i < i0 or i > i1 or j < j0 or j > j1:
+                    continue
+                cell = cells.get((i, j))
+                if cell is None:
+                    cell = cells[(i, j)] = _new_cell()
+                cell[_COUNT] += 1
+                cell[_LAT] += lat
+                cell[_LNG] += lng
+                cell[_FIRST_PRIORITY + slot] += 1
+        return cells
+
+    def clusters(
+        self,
+        zoom: int,
+        bbox: tuple[float, float, float, float] | None = None,
+    ) -> list[dict]:
+        """
+        Clusters at `zoom` whose cell intersects `bbox`
+        (min_lng, min_lat, max_lng, max_lat); the whole map if None, which
+        only the grid zooms allow. Call (and await) `ready` first.
+        """
+        if not self._built:
+            raise RuntimeError("Cluster index is not built; await ready() first")
+        zoom = max(0, min(MAX_ZOOM, zoom))
+        if zoom > GRID_MAX_ZOOM and bbox is None:
+            raise ValueError(f"A bbox is required above zoom {GRID_MAX_ZOOM}")
+        size = self._sizes[zoom]
+        if zoom <= GRID_MAX_ZOOM:
+            grid = self._grids[zoom]
+            cells = [((i, j), grid[(i, j)]) for i, j in self._keys_in(zoom, grid, bbox)]
+        else:
+            cells = list(self._bucket_points(zoom, bbox).items())
+
+        result = []
+        for (i, j), cell in cells:
+            count = cell[_COUNT]
+            result.append(
+                {
+                    "lat": round(cell[_LAT] / count, 6),
+                    "lng": round(cell[_LNG] / count, 6),
+                    "count": count,
+                    "priority": {
+                        p: n
+                        for p, n in zip(PRIORITIES, cell[_FIRST_PRIORITY:])
+                        if n
+                    },
+                    "bounds": [
+                        j * size - 180,
+                        i * size - 90,
+                        (j + 1) * size - 180,
+                        (i + 1) * size - 90,
+                    ],
+                }
+            )
+        return result
+
+
+def clusters_for(store: ReportStore) -> ReportClusters:
+    """The (lazily created) live clusters attached to `store`."""
+    return store.listener("clusters", ReportClusters)
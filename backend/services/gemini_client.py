@@ -0,0 +1,206 @@
+"""
+Shared async Gemini client.
+
+Every Gemini call in the backend goes through the single `client` instance
+defined here so a slow model response never blocks the event loop:
+  * calls are awaitable (`generate_content_async` under the hood)
+  * calls are admitted by the shared quota scheduler (gemini_quota): at most
+    GEMINI_MAX_CONCURRENCY in flight, within GEMINI_RPM / GEMINI_TPM, best
+    priority class first
+  * a 429 that slips through pauses the scheduler and the call queues again,
+    up to GEMINI_MAX_RETRIES attempts
+  * every attempt is bounded by GEMINI_TIMEOUT_SECONDS
+  * each caller path ("analysis", "insights") has a circuit breaker
+    (circuit_breaker): while Gemini is failing or slow, calls are rejected
+    at once with CircuitOpenError so callers can serve their fallback
+  * the model call goes to the backend chosen by LLM_BACKEND (llm_backend):
+    Gemini itself, or a local stand-in for load testing
+"""
+
+import asyncio
+import os
+import time
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.gemini_quota import Priority, QuotaScheduler
+from services.llm_backend import create_backend
+from services.metrics import GEMINI_BUCKETS, registry
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_DELAY_SECONDS", "15"))
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+
+# Token estimate used for quota admission, corrected after each call with
+# the usage Gemini reports: ~4 characters per text token, a fixed cost per
+# inline image, and an allowance for the answer
+_CHARS_PER_TOKEN = 4
+_IMAGE_TOKENS = 258
+_OUTPUT_TOKENS = 512
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+# `caller` is the circuit: "analysis" (report / /analyze images) or "insights"
+
+_calls = registry.counter(
+    "potsoft_gemini_calls_total",
+    "Gemini call attempts by caller and outcome "
+    "(ok, error, timeout, rate_limited, cancelled, rejected by an open circuit).",
+    ("caller", "outcome"),
+)
+_retries = registry.counter(
+    "potsoft_gemini_retries_total",
+    "Gemini attempts that re-queued after a 429.",
+    ("caller",),
+)
+_latency = registry.histogram(
+    "potsoft_gemini_call_duration_seconds",
+    "Latency of Gemini call attempts, excluding the quota wait.",
+    ("caller",),
+    GEMINI_BUCKETS,
+)
+_quota_wait = registry.histogram(
+    "potsoft_gemini_quota_wait_seconds",
+    "Time Gemini calls waited for a quota permit.",
+    ("caller",),
+    GEMINI_BUCKETS,
+)
+_tokens = registry.counter(
+    "potsoft_gemini_tokens_total",
+    "Tokens of successful Gemini calls, as reported by the backend or estimated.",
+    ("caller", "source"),
+)
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """True if the exception looks like a Gemini 429 / quota error."""
+    err_str = str(exc).lower()
+    return "429" in err_str or "resource_exhausted" in err_str or "quota" in err_str
+
+
+def estimate_tokens(contents) -> int:
+    """Rough token cost of a prompt (string or list of parts) plus answer."""
+    parts = [contents] if isinstance(contents, str) else contents
+    tokens = _OUTPUT_TOKENS
+    for part in parts:
+        if isinstance(part, str):
+            tokens += len(part) // _CHARS_PER_TOKEN + 1
+        else:
+            tokens += _IMAGE_TOKENS
+    return tokens
+
+
+class GeminiClient:
+    """Awaitable, quota-scheduled wrapper around an LLM backend."""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        timeout: float = TIMEOUT_SECONDS,
+        retry_base_delay: float = RETRY_BASE_DELAY,
+        backend=None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retry_base_delay = retry_base_delay
+        self.quota = QuotaScheduler(max_concurrency=max_concurrency)
+        self.circuits = {
+            "analysis": CircuitBreaker("Gemini image analysis"),
+            "insights": CircuitBreaker("Gemini insights"),
+        }
+        self.backend = backend if backend is not None else create_backend()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of Gemini requests currently awaiting a response."""
+        return self.quota.in_flight
+
+    async def generate(
+        self,
+        contents,
+        *,
+        model: str = DEFAULT_MODEL,
+        priority: Priority = Priority.INTERACTIVE,
+        circuit: str = "analysis",
+        max_retries: int = MAX_RETRIES,
+        timeout: float | None = None,
+    ) -> str:
+        """
+        Send `contents` (a prompt string or a list of prompt parts) to Gemini
+        and return the response text.
+
+        The call waits for quota in its `priority` class first; the timeout
+        covers each attempt, not the wait. On a rate-limit error the whole
+        scheduler pauses 1x, 2x, 3x... RETRY_BASE_DELAY and the call queues
+        again, up to `max_retries` attempts in total. Any other error is
+        raised immediately.
+
+        Each attempt is admitted by the `circuit` breaker, which raises
+        CircuitOpenError instead of calling Gemini while it is open. Errors,
+        timeouts and slow answers count against the circuit; 429s don't,
+        since the quota scheduler deals with those.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        breaker = self.circuits[circuit]
+        estimate = estimate_tokens(contents)
+        for attempt in range(max_retries):
+            if attempt:
+                _retries.inc((circuit,))
+            try:
+                token = breaker.allow()
+            except CircuitOpenError:
+                _calls.inc((circuit, "rejected"))
+                raise
+            queued = time.monotonic()
+            try:
+                tokens = await self.quota.acquire(priority, estimate)
+            except asyncio.CancelledError:
+                breaker.abandon(token)
+                raise
+            started = time.monotonic()
+            _quota_wait.observe(started - queued, (circuit,))
+            used = None
+            outcome = "cancelled"
+            try:
+                result = await asyncio.wait_for(
+                    self.backend.generate(contents, model), timeout
+                )
+                used = result.tokens
+                outcome = "ok"
+                breaker.record(token, True, time.monotonic() - started)
+                return result.text
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                breaker.record(token, False, timeout)
+                raise TimeoutError(f"Gemini call timed out after {timeout:g}s")
+            except asyncio.CancelledError:
+                breaker.abandon(token)
+                raise
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    outcome = "error"
+                    breaker.record(token, False, time.monotonic() - started)
+                    raise
+                outcome = "rate_limited"
+                breaker.abandon(token)
+                if attempt == max_retries - 1:
+                    raise
+                self.quota.throttle((attempt + 1) * self.retry_base_delay)
+            finally:
+                self.quota.release(tokens, used)
+                _latency.observe(time.monotonic() - started, (circuit,))
+                _calls.inc((circuit, outcome))
+                if outcome == "ok":
+                    if used:
+                        _tokens.inc((circuit, "reported"), used)
+                    else:
+                        _tokens.inc((circuit, "estimated"), tokens)
+        return ""
+
+    def circuit_stats(self) -> dict:
+        return {name: breaker.stats() for name, breaker in self.circuits.items()}
+
+
+# Shared instance used by every route and service
+client = GeminiClient()
@@ -0,0 +1,207 @@
+"""
+Shared Gemini quota scheduler.
+
+Every Gemini call draws on the API key's per-minute quotas for requests
+(GEMINI_RPM) and tokens (GEMINI_TPM). QuotaScheduler models both as token
+buckets that refill continuously, and also caps the number of calls in
+flight. A caller `acquire`s a permit with an estimated token cost and a
+priority class. When the budget is short it waits in a queue instead of
+being sent off to collect a 429:
+
+  INTERACTIVE  citizen submissions and /analyze
+  BULK         bulk imports and reports requeued after a restart
+  INSIGHTS     dashboard insight generation
+
+Waiters are served strictly by class, then in arrival order, so a dashboard
+refreshing insights can't hold up a citizen's submission. After the call
+the estimate is corrected with the token count Gemini reports. If Gemini
+still answers 429 (the key is shared, or the limits are set too high),
+`throttle` pauses all dispatch for the backoff delay and the caller queues
+again.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from enum import IntEnum
+
+# 0 disables a limit
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "1000"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+
+
+class Priority(IntEnum):
+    """Gemini caller classes; lower values are served first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+    INSIGHTS = 2
+
+
+class _Bucket:
+    """Refills `per_minute` units evenly over a minute, holding at most that."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self._at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._at) * self.rate)
+        self._at = now
+
+    def wait(self, amount: float) -> float:
+        """Seconds until `amount` is available; 0 if it is now."""
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "future", "queued_at")
+
+    def __init__(self, priority: Priority, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.tokens = tokens
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class QuotaScheduler:
+    """Priority queue of Gemini callers in front of RPM / TPM token buckets."""
+
+    def __init__(
+        self,
+        rpm: float = GEMINI_RPM,
+        tpm: float = GEMINI_TPM,
+        max_concurrency: int = 16,
+    ):
+        self._requests = _Bucket(rpm) if rpm > 0 else None
+        self._tokens = _Bucket(tpm) if tpm > 0 else None
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.throttled = 0
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._order = itertools.count()
+        self._paused_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._granted = {p: 0 for p in Priority}
+        self._wait_total = {p: 0.0 for p in Priority}
+        self._wait_max = {p: 0.0 for p in Priority}
+
+    async def acquire(self, priority: Priority, tokens: int) -> int:
+        """
+        Wait for a call slot and budget for one request of about `tokens`
+        tokens. Returns the tokens debited; pass them back to `release`.
+        """
+        if self._tokens is not None:
+            # A request larger than a minute's quota would never fit
+            tokens = min(tokens, int(self._tokens.capacity))
+        self._loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, tokens, self._loop.create_future())
+        heapq.heappush(self._queue, (priority, next(self._order), waiter))
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller gave up: hand the budget back
+                self._refund(tokens)
+            raise
+        return tokens
+
+    def release(self, tokens: int, used: int | None = None) -> None:
+        """End a call; correct the token budget with Gemini's reported usage."""
+        self.in_flight -= 1
+        if self._tokens is not None and used:
+            self._tokens.level -= used - tokens
+        self._dispatch()
+
+    def throttle(self, delay: float) -> None:
+        """Gemini answered 429: hold every caller for `delay` seconds."""
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._dispatch()
+
+    def _refund(self, tokens: int) -> None:
+        if self._requests is not None:
+            self._requests.level += 1
+        if self._tokens is not None:
+            self._tokens.level += tokens
+        self.release(tokens)
+
+    def _dispatch(self) -> None:
+        """Grant permits to queued callers, best class first, while budget lasts."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        for bucket in (self._requests, self._tokens):
+            if bucket is not None:
+                bucket.refill(now)
+
+        while self._queue:
+            waiter = self._queue[0][2]
+            if waiter.future.done():  # caller gave up while queued
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= self.max_concurrency:
+                return  # the next release dispatches again
+            delay = max(
+                self._paused_until - now,
+                self._requests.wait(1) if self._requests is not None else 0.0,
+                self._tokens.wait(waiter.tokens) if self._tokens is not None else 0.0,
+            )
+            if delay > 0:
+                self._timer = self._loop.call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self._queue)
+            if self._requests is not None:
+                self._requests.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= waiter.tokens
+            self.in_flight += 1
+            waited = now - waiter.queued_at
+            self._granted[waiter.priority] += 1
+            self._wait_total[waiter.priority] += waited
+            self._wait_max[waiter.priority] = max(self._wait_max[waiter.priority], waited)
+            waiter.future.set_result(None)
+
+    def stats(self) -> dict:
+        """Budget left, 429 pauses, and queue depth / wait times per class."""
+        now = time.monotonic()
+        queued = {p: 0 for p in Priority}
+        for priority, _, waiter in self._queue:
+            if not waiter.future.done():
+                queued[priority] += 1
+        for bucket in (self._requests, self._tokens):
+            if bucket is not None:
+                bucket.refill(now)
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests_available": (
+                int(self._requests.level) if self._requests is not None else None
+            ),
+            "tokens_available": (
+                int(self._tokens.level) if self._tokens is not None else None
+            ),
+            "throttled": self.throttled,
+            "paused_seconds": round(max(0.0, self._paused_until - now), 1),
+            "classes": {
+                p.name.lower(): {
+                    "queued": queued[p],
+                    "granted": self._granted[p],
+                    "avg_wait_ms": round(
+                        1000 * self._wait_total[p] / self._granted[p], 1
+                    )
+                    if self._granted[p]
+                    else 0.0,
+                    "max_wait_ms": round(1000 * self._wait_max[p], 1),
+                }
+                for p in Priority
+            },
+        }
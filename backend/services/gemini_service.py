@@ -1,16 +1,8 @@
-import os
 import json
 import re
-import google.generativeai as genai
-from dotenv import load_dotenv
-import base64
 from schemas.response_model import AnalysisResponse
-
-# Explicitly load .env from the backend directory
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
-
-# Configure the Gemini API key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+from services.circuit_breaker import CircuitOpenError
+from services.gemini_client import Priority, client
 
 ANALYSIS_PROMPT = """Analyse this road image and respond with ONLY a valid JSON object (no markdown, no code fences, no extra text):
 {{
@@ -30,6 +22,51 @@ Rules:
 """
 
 
+BATCH_ANALYSIS_PROMPT = """You will be shown {count} road images. Each image is preceded by its label "Image <index>:" (indexes 0 to {last}).
+Analyse every image independently and respond with ONLY a valid JSON array (no markdown, no code fences, no extra text) holding exactly one object per image:
+[
+  {{
+    "index": <index from the image's label>,
+    "is_pothole": true or false,
+    "size_category": "Small" | "Medium" | "Large",
+    "priority_color": "Green" | "Yellow" | "Red",
+    "estimated_duration": "4 hours" | "1 day" | "3 days"
+  }}
+]
+
+Rules:
+- is_pothole: true only if a pothole is clearly visible in the image
+- size_category: Small (<20cm), Medium (20-50cm), Large (>50cm)
+- priority_color: Green = Small, Yellow = Medium, Red = Large
+- estimated_duration: "4 hours" for Small, "1 day" for Medium, "3 days" for Large
+"""
+
+
+def _strip_fences(raw_text: str) -> str:
+    cleaned = raw_text.strip()
+    cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
+    cleaned = re.sub(r"\s*```$", "", cleaned)
+    return cleaned.strip()
+
+
+def _normalise(parsed: dict) -> dict:
+    """Validate and normalise the fields of one analysis object."""
+    result = {}
+    result["is_pothole"] = bool(parsed.get("is_pothole", False))
+    result["size_category"] = parsed.get("size_category", "Small")
+    if result["size_category"] not in ("Small", "Medium", "Large"):
+        result["size_category"] = "Small"
+
+    result["priority_color"] = parsed.get("priority_color", "Green")
+    if result["priority_color"] not in ("Green", "Yellow", "Red"):
+        result["priority_color"] = "Green"
+
+    result["estimated_duration"] = parsed.get("estimated_duration", "4 hours")
+    result["jurisdiction"] = parsed.get("jurisdiction", "Unknown")
+
+    return result
+
+
 def parse_gemini_response(raw_text: str) -> dict:
     """
     Parse the raw Gemini response text into a structured dict.
@@ -45,53 +82,109 @@ def parse_gemini_response(raw_text: str) -> dict:
     }
 
     try:
-        # Strip markdown code fences if present
-        cleaned = raw_text.strip()
-        cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
-        cleaned = re.sub(r"\s*```$", "", cleaned)
-        cleaned = cleaned.strip()
-
-        parsed = json.loads(cleaned)
-
-        # Validate and normalise fields
-        result = {}
-        result["is_pothole"] = bool(parsed.get("is_pothole", False))
-        result["size_category"] = parsed.get("size_category", "Small")
-        if result["size_category"] not in ("Small", "Medium", "Large"):
-            result["size_category"] = "Small"
-
-        result["priority_color"] = parsed.get("priority_color", "Green")
-        if result["priority_color"] not in ("Green", "Yellow", "Red"):
-            result["priority_color"] = "Green"
-
-        result["estimated_duration"] = parsed.get("estimated_duration", "4 hours")
-        result["jurisdiction"] = parsed.get("jurisdiction", "Unknown")
-
-        return result
+        parsed = json.loads(_strip_fences(raw_text))
+        return _normalise(parsed)
     except (json.JSONDecodeError, AttributeError, TypeError):
         return defaults
 
 
-def analyze_image(
-    image_base64: str, mime_type: str = "image/jpeg", lat: float = 0.0, lng: float = 0.0
+def parse_batch_response(raw_text: str, count: int) -> list[dict | None]:
+    """
+    Parse a batched analysis into one result per image, in index order.
+    An image whose entry is missing, duplicated or malformed gets None, so
+    the caller can retry just that image on its own.
+    """
+    results: list[dict | None] = [None] * count
+    cleaned = _strip_fences(raw_text)
+    try:
+        parsed = json.loads(cleaned)
+    except json.JSONDecodeError:
+        # Tolerate prose around the array
+        match = re.search(r"\[.*\]", cleaned, re.DOTALL)
+        if match is None:
+            return results
+        try:
+            parsed = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return results
+    if isinstance(parsed, dict):
+        parsed = parsed.get("results", parsed.get("images"))
+    if not isinstance(parsed, list):
+        return results
+
+    seen = set()
+    for item in parsed:
+        if not isinstance(item, dict) or "is_pothole" not in item:
+            continue
+        index = item.get("index")
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        if not isinstance(index, int) or not 0 <= index < count:
+            continue
+        if index in seen:
+            results[index] = None  # ambiguous: retry this image alone
+            continue
+        seen.add(index)
+        try:
+            results[index] = _normalise(item)
+        except (AttributeError, TypeError):
+            continue
+    return results
+
+
+async def analyze_image(
+    image: bytes,
+    mime_type: str = "image/jpeg",
+    lat: float = 0.0,
+    lng: float = 0.0,
+    priority: Priority = Priority.INTERACTIVE,
 ) -> AnalysisResponse:
     """
-    Sends the image to the Gemini Vision API for analysis.
-    Returns an AnalysisResponse with the raw text in `analysis`.
+    Sends the image to the Gemini Vision API for analysis via the shared
+    async client. Returns an AnalysisResponse with the raw text in `analysis`.
+    The raw bytes are passed as an inline blob; the SDK encodes them itself.
+    `priority` is the quota class the call waits in. CircuitOpenError is
+    raised rather than reported, so callers choose their own fallback.
     """
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-
-        image_parts = [{"mime_type": mime_type, "data": image_base64}]
+        image_parts = [{"mime_type": mime_type, "data": image}]
 
         prompt = ANALYSIS_PROMPT.format(lat=lat, lng=lng)
 
-        response = model.generate_content([prompt, image_parts[0]])
+        text = await client.generate([prompt, image_parts[0]], priority=priority)
 
-        if response.text:
-            return AnalysisResponse(success=True, analysis=response.text)
+        if text:
+            return AnalysisResponse(success=True, analysis=text)
         else:
             return AnalysisResponse(success=False, error="Could not analyze the image.")
 
+    except CircuitOpenError:
+        raise
     except Exception as e:
         return AnalysisResponse(success=False, error=f"An error occurred: {str(e)}")
+
+
+async def analyze_images(
+    images: list[tuple[bytes, str]], priority: Priority = Priority.INTERACTIVE
+) -> list[dict | None]:
+    """
+    Analyse several (image bytes, mime type) pairs in one Gemini request.
+
+    Returns one normalised analysis per image, in order. Images the model
+    did not answer for cleanly are None, and so is everything if the call
+    fails, so callers can fall back to `analyze_image` for just those.
+    The jurisdiction is not requested since callers resolve it from
+    coordinates.
+    """
+    contents: list = [
+        BATCH_ANALYSIS_PROMPT.format(count=len(images), last=len(images) - 1)
+    ]
+    for index, (image, mime_type) in enumerate(images):
+        contents.append(f"Image {index}:")
+        contents.append({"mime_type": mime_type, "data": image})
+
+    try:
+        text = await client.generate(contents, priority=priority)
+    except Exception:
+        return [None] * len(images)
+    return parse_batch_response(text or "", len(images))
@@ -0,0 +1,145 @@
+"""
+Image preprocessing ahead of Gemini analysis and storage.
+
+Phone photos arrive at 4-12 MB, far more resolution than the model needs.
+Each upload is decoded once in a worker pool, rotated upright from its EXIF
+orientation, downscaled to fit IMAGE_MAX_DIMENSION, and re-encoded as JPEG
+at IMAGE_JPEG_QUALITY. Re-encoding drops all metadata (EXIF, GPS, XMP), and
+formats Gemini may not accept (HEIC, AVIF, TIFF, ...) come out as JPEG too.
+While the image is decoded, a 64-bit difference hash (dHash) is computed for
+the analysis cache, so near-identical photos can be matched cheaply.
+
+Pillow releases the GIL while decoding, resizing and encoding, so a thread
+pool gives real parallelism without copying image bytes between processes.
+Images are decoded straight from the spooled upload file, so the original
+is never held in memory as one bytes object; for JPEGs the decoder already
+works at a reduced scale. HEIC is decoded by `pillow-heif`; if it is not
+installed a warning is logged at startup and HEIC uploads, like any image
+that cannot be decoded, are passed through unchanged.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pillow_heif
+
+    pillow_heif.register_heif_opener()
+except ImportError:
+    logger.warning(
+        "pillow-heif is not installed; HEIC uploads will be stored unconverted"
+    )
+
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1600"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+OUTPUT_MIME = "image/jpeg"
+
+
+class PreprocessedImage:
+    """Result of preprocessing one upload."""
+
+    __slots__ = ("data", "mime_type", "original_bytes", "dhash")
+
+    def __init__(
+        self,
+        data: bytes | None,
+        mime_type: str,
+        original_bytes: int,
+        dhash: int | None = None,
+    ):
+        self.data = data  # None: not decodable, keep the original upload as is
+        self.mime_type = mime_type
+        self.original_bytes = original_bytes
+        self.dhash = dhash  # None when the image could not be decoded
+
+    @property
+    def output_bytes(self) -> int:
+        return self.original_bytes if self.data is None else len(self.data)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.output_bytes
+
+
+def difference_hash(img: Image.Image) -> int:
+    """64-bit dHash: is each pixel brighter than its right neighbour (9x8 grey)."""
+    pixels = img.convert("L").resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            i = row * 9 + col
+            bits = (bits << 1) | (pixels[i] > pixels[i + 1])
+    return bits
+
+
+def preprocess_image(source: BinaryIO, mime_type: str) -> PreprocessedImage:
+    """Normalise one image file synchronously (runs inside the worker pool)."""
+    source.seek(0, os.SEEK_END)
+    original_bytes = source.tell()
+    source.seek(0)
+    try:
+        with Image.open(source) as img:
+            # Let the JPEG decoder skip straight to a reduced scale when it can
+            img.draft("RGB", (IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION))
+            # Shrink before rotating (the bound is square, so order does not
+            # matter) so the rotated copy is made at the reduced size
+            img.thumbnail(
+                (IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION), Image.Resampling.LANCZOS
+            )
+            img = ImageOps.exif_transpose(img)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+            dhash = difference_hash(img)
+    except Exception:
+        return PreprocessedImage(None, mime_type, original_bytes)
+    return PreprocessedImage(out.getvalue(), OUTPUT_MIME, original_bytes, dhash)
+
+
+class ImagePreprocessor:
+    """Runs `preprocess_image` off the event loop and tracks bytes saved."""
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="image-preprocess"
+        )
+        self._lock = threading.Lock()
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def process(self, source: BinaryIO, mime_type: str) -> PreprocessedImage:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._executor, preprocess_image, source, mime_type
+        )
+        with self._lock:
+            self.images += 1
+            self.bytes_in += result.original_bytes
+            self.bytes_out += result.output_bytes
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "images": self.images,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+            }
+
+
+# Shared pool used by the upload routes
+preprocessor = ImagePreprocessor()
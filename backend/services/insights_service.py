@@ -1,45 +1,106 @@
 """
 Gemini-powered analytics insights engine.
 
-Builds structured data summaries from the in-memory report store and sends
+Builds structured data summaries from the indexed report store and sends
 them to Gemini 2.5 Flash for natural-language analysis across four domains:
   1. Executive Summary
   2. Trend Analysis
   3. Priority Recommendations
   4. Jurisdiction Scorecards
 
-Results are cached for 5 minutes to avoid excessive Gemini API calls.
+Results are cached per store version with single-flight regeneration and
+stale-while-revalidate, so dashboards never wait on Gemini for data they
+have effectively already seen. If generation fails (including instantly,
+while the insights circuit breaker is open) the last good result for that
+insight is served instead, even after the cache was cleared.
 """
 
+import asyncio
 import json
-import os
 import re
 import time
 from datetime import datetime, timezone
-from collections import defaultdict
+from typing import AsyncIterator, Awaitable, Callable
 
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-# Load .env and configure Gemini API key
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+from services.gemini_client import Priority, client
+from services.report_aggregates import aggregates_for
+from store import ReportStore
 
 # ── Cache ────────────────────────────────────────────────────────────────────
-_cache: dict[str, tuple[float, dict]] = {}
+# Each entry is tagged with the store version it was generated from. An entry
+# is fresh while the data is unchanged (up to _CACHE_TTL, since ages and
+# overdue counts drift with time) and always for its first _MIN_REFRESH
+# seconds. Otherwise it is stale: it is still returned immediately while a
+# single background task regenerates it. Concurrent misses share one
+# in-flight generation instead of each calling Gemini.
 _CACHE_TTL = 300  # 5 minutes
+_MIN_REFRESH = 30  # don't regenerate more often than this, even if data changed
+
+_cache: dict[str, tuple[int, float, dict]] = {}  # kind -> (version, created, data)
+_last_good: dict[str, dict] = {}  # kind -> latest successful result, never cleared
+_inflight: dict[str, asyncio.Task] = {}
+_stats = {"hits": 0, "misses": 0, "stale": 0, "fallbacks": 0}
+
+
+def _refresh(
+    kind: str,
+    reports: ReportStore,
+    generate: Callable[[ReportStore, "_PromptData"], Awaitable[dict]],
+    data: "_PromptData | None" = None,
+) -> asyncio.Task:
+    """Start (or join) the single in-flight generation for `kind`."""
+    task = _inflight.get(kind)
+    if task is not None:
+        return task
+
+    async def run() -> dict:
+        version = reports.version
+        result = await generate(reports, data or _PromptData(reports))
+        _cache[kind] = (version, time.time(), result)
+        _last_good[kind] = result
+        return result
+
+    def done(t: asyncio.Task) -> None:
+        _inflight.pop(kind, None)
+        if not t.cancelled():
+            t.exception()  # mark retrieved; waiters see it, background refreshes drop it
+
+    task = _inflight[kind] = asyncio.create_task(run())
+    task.add_done_callback(done)
+    return task
+
+
+async def _cached(
+    kind: str,
+    reports: ReportStore,
+    generate: Callable[[ReportStore, "_PromptData"], Awaitable[dict]],
+    data: "_PromptData | None" = None,
+) -> dict:
+    entry = _cache.get(kind)
+    if entry is None:
+        _stats["misses"] += 1
+        try:
+            # shield: a client disconnecting must not cancel the shared generation
+            return await asyncio.shield(_refresh(kind, reports, generate, data))
+        except Exception:
+            if kind not in _last_good:
+                raise
+            _stats["fallbacks"] += 1
+            return _last_good[kind]
 
-
-def _get_cached(key: str) -> dict | None:
-    if key in _cache:
-        ts, data = _cache[key]
-        if time.time() - ts < _CACHE_TTL:
-            return data
-    return None
+    cached_version, created, cached = entry
+    age = time.time() - created
+    if age < _MIN_REFRESH or (cached_version == reports.version and age < _CACHE_TTL):
+        _stats["hits"] += 1
+    else:
+        _stats["stale"] += 1
+        _refresh(kind, reports, generate, data)
+    return cached
 
 
-def _set_cached(key: str, data: dict):
-    _cache[key] = (time.time(), data)
+def cache_stats() -> dict:
+    """Hit / miss / stale-served / fallback counters plus current cache state."""
+    return {**_stats, "entries": len(_cache), "in_flight": len(_inflight)}
 
 
 def clear_cache():
@@ -49,86 +110,36 @@ def clear_cache():
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
 
-def _build_data_summary(reports: list[dict]) -> dict:
-    """Build an aggregate summary dict from the raw report list."""
-    now = datetime.now(timezone.utc)
-    total = len(reports)
+def _build_data_summary(reports: ReportStore) -> dict:
+    """
+    Aggregate summary of the report store. Served from the live aggregates,
+    which are updated on every write, so this never walks the reports.
+    """
+    return aggregates_for(reports).summary()
 
-    # Counts by priority / status / size
-    priority_counts = defaultdict(int)
-    status_counts = defaultdict(int)
-    size_counts = defaultdict(int)
-    jurisdiction_map: dict[str, list[dict]] = defaultdict(list)
 
-    overdue_ids = []
-    ages_hours = []
+class _PromptData:
+    """
+    Data summary for one round of prompts, built and serialized at most once
+    however many insights are generated from it.
+    """
 
-    for r in reports:
-        priority_counts[r.get("priority_color", "Green")] += 1
-        status_counts[r.get("status", "Reported")] += 1
-        size_counts[r.get("size_category", "Small")] += 1
-        jurisdiction_map[r.get("jurisdiction", "Unknown")].append(r)
+    def __init__(self, reports: ReportStore):
+        self._reports = reports
+        self._summary: dict | None = None
+        self._summary_json: str | None = None
 
-        try:
-            ts = datetime.fromisoformat(r["timestamp"])
-            age_h = (now - ts).total_seconds() / 3600
-            ages_hours.append(age_h)
-            if r.get("status") == "Reported" and age_h > 24:
-                overdue_ids.append(r["id"])
-        except Exception:
-            pass
-
-    finished = status_counts.get("Finished", 0)
-    resolution_rate = round(finished / total * 100, 1) if total else 0
-    avg_age_h = round(sum(ages_hours) / len(ages_hours), 1) if ages_hours else 0
-
-    # Per-jurisdiction summary
-    jurisdiction_summaries = {}
-    for jur, reps in jurisdiction_map.items():
-        j_total = len(reps)
-        j_finished = sum(1 for r in reps if r.get("status") == "Finished")
-        j_red = sum(1 for r in reps if r.get("priority_color") == "Red")
-        j_overdue = sum(
-            1 for r in reps if r.get("status") == "Reported" and _age_hours(r, now) > 24
-        )
-        j_ages = [_age_hours(r, now) for r in reps if r.get("status") != "Finished"]
-        j_avg_response = round(sum(j_ages) / len(j_ages), 1) if j_ages else 0
-        jurisdiction_summaries[jur] = {
-            "total": j_total,
-            "finished": j_finished,
-            "red": j_red,
-            "overdue": j_overdue,
-            "resolution_rate": round(j_finished / j_total * 100, 1) if j_total else 0,
-            "avg_open_hours": j_avg_response,
-        }
-
-    # Daily volume (last 14 days)
-    daily_reported: dict[str, int] = defaultdict(int)
-    daily_finished: dict[str, int] = defaultdict(int)
-    for r in reports:
-        try:
-            ts = datetime.fromisoformat(r["timestamp"])
-            day_str = ts.strftime("%Y-%m-%d")
-            daily_reported[day_str] += 1
-            if r.get("status") == "Finished":
-                daily_finished[day_str] += 1
-        except Exception:
-            pass
-
-    return {
-        "total_reports": total,
-        "priority": dict(priority_counts),
-        "status": dict(status_counts),
-        "size": dict(size_counts),
-        "resolution_rate": resolution_rate,
-        "avg_age_hours": avg_age_h,
-        "overdue_count": len(overdue_ids),
-        "overdue_ids": overdue_ids[:20],
-        "jurisdiction_count": len(jurisdiction_map),
-        "jurisdictions": jurisdiction_summaries,
-        "daily_reported": dict(daily_reported),
-        "daily_finished": dict(daily_finished),
-    }
+    @property
+    def summary(self) -> dict:
+        if self._summary is None:
+            self._summary = _build_data_summary(self._reports)
+        return self._summary
+
+    @property
+    def summary_json(self) -> str:
+        if self._summary_json is None:
+            self._summary_json = json.dumps(self.summary, indent=2)
+        return self._summary_json
 
 
 def _age_hours(report: dict, now: datetime) -> float:
@@ -139,25 +150,14 @@ def _age_hours(report: dict, now: datetime) -> float:
         return 0
 
 
-def _call_gemini(prompt: str, max_retries: int = 3) -> str:
-    """Send a text prompt to Gemini with retry on rate-limit errors."""
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    for attempt in range(max_retries):
-        try:
-            response = model.generate_content(prompt)
-            return response.text or ""
-        except Exception as e:
-            err_str = str(e).lower()
-            is_rate_limit = (
-                "429" in err_str
-                or "resource_exhausted" in err_str
-                or "quota" in err_str
-            )
-            if is_rate_limit and attempt < max_retries - 1:
-                wait = (attempt + 1) * 15  # 15s, 30s, 45s
-                time.sleep(wait)
-                continue
-            raise
+async def _call_gemini(prompt: str, max_retries: int = 3) -> str:
+    """
+    Send a text prompt to Gemini with retry on rate-limit errors. Insights
+    are the lowest quota class, so they never delay report analysis.
+    """
+    return await client.generate(
+        prompt, priority=Priority.INSIGHTS, circuit="insights", max_retries=max_retries
+    )
 
 
 def _parse_json_response(raw: str) -> dict:
@@ -172,22 +172,18 @@ def _parse_json_response(raw: str) -> dict:
         return {"raw_text": cleaned}
 
 
-# ── Public API ───────────────────────────────────────────────────────────────
+# ── Generators ───────────────────────────────────────────────────────────────
 
 
-def generate_summary(reports: list[dict]) -> dict:
+async def _generate_summary(reports: ReportStore, data: _PromptData) -> dict:
     """Executive summary: natural-language weekly report."""
-    cached = _get_cached("summary")
-    if cached:
-        return cached
-
-    summary = _build_data_summary(reports)
+    summary = data.summary
     prompt = f"""You are PotSoft AI, an infrastructure analytics assistant for Malaysian road maintenance.
 
 Given this pothole report data summary, write an executive briefing in JSON format.
 
 DATA:
-{json.dumps(summary, indent=2)}
+{data.summary_json}
 
 Respond with ONLY valid JSON (no markdown, no code fences):
 {{
@@ -204,25 +200,18 @@ Respond with ONLY valid JSON (no markdown, no code fences):
   "recommendations": ["recommendation 1", "recommendation 2", "recommendation 3"]
 }}
 """
-    raw = _call_gemini(prompt)
-    result = _parse_json_response(raw)
-    _set_cached("summary", result)
-    return result
+    raw = await _call_gemini(prompt)
+    return _parse_json_response(raw)
 
 
-def generate_trends(reports: list[dict]) -> dict:
+async def _generate_trends(reports: ReportStore, data: _PromptData) -> dict:
     """Trend analysis: emerging hotspots, worsening areas, time-based patterns."""
-    cached = _get_cached("trends")
-    if cached:
-        return cached
-
-    summary = _build_data_summary(reports)
     prompt = f"""You are PotSoft AI, an infrastructure analytics assistant.
 
 Analyse these pothole report statistics and identify trends.
 
 DATA:
-{json.dumps(summary, indent=2)}
+{data.summary_json}
 
 Respond with ONLY valid JSON (no markdown, no code fences):
 {{
@@ -240,21 +229,15 @@ Respond with ONLY valid JSON (no markdown, no code fences):
   "summary": "2-3 sentence natural-language trend summary"
 }}
 """
-    raw = _call_gemini(prompt)
-    result = _parse_json_response(raw)
-    _set_cached("trends", result)
-    return result
+    raw = await _call_gemini(prompt)
+    return _parse_json_response(raw)
 
 
-def generate_recommendations(reports: list[dict]) -> dict:
+async def _generate_recommendations(reports: ReportStore, data: _PromptData) -> dict:
     """Priority recommendations: ranked list of what to fix first."""
-    cached = _get_cached("recommendations")
-    if cached:
-        return cached
-
     # Build a prioritised shortlist of actionable reports
     now = datetime.now(timezone.utc)
-    actionable = [r for r in reports if r.get("status") in ("Reported", "Analyzed")]
+    actionable = [r for _, r in reports.query(status=("Reported", "Analyzed"))]
     # Sort by priority (Red first), then age (oldest first)
     prio_order = {"Red": 0, "Yellow": 1, "Green": 2}
     actionable.sort(
@@ -280,7 +263,6 @@ def generate_recommendations(reports: list[dict]) -> dict:
             }
         )
 
-    summary = _build_data_summary(reports)
     prompt = f"""You are PotSoft AI, a road maintenance prioritisation expert.
 
 Given these actionable pothole reports and overall statistics, rank the top 10 reports
@@ -291,7 +273,7 @@ ACTIONABLE REPORTS:
 {json.dumps(top_20, indent=2)}
 
 OVERALL STATS:
-{json.dumps(summary, indent=2)}
+{data.summary_json}
 
 Respond with ONLY valid JSON (no markdown, no code fences):
 {{
@@ -312,19 +294,13 @@ Respond with ONLY valid JSON (no markdown, no code fences):
   "resource_suggestion": "recommendation on how to allocate repair crews"
 }}
 """
-    raw = _call_gemini(prompt)
-    result = _parse_json_response(raw)
-    _set_cached("recommendations", result)
-    return result
+    raw = await _call_gemini(prompt)
+    return _parse_json_response(raw)
 
 
-def generate_jurisdiction_scores(reports: list[dict]) -> dict:
+async def _generate_jurisdiction_scores(reports: ReportStore, data: _PromptData) -> dict:
     """Jurisdiction scorecards: performance ratings per local authority."""
-    cached = _get_cached("jurisdictions")
-    if cached:
-        return cached
-
-    summary = _build_data_summary(reports)
+    summary = data.summary
     prompt = f"""You are PotSoft AI, a municipal performance evaluator.
 
 Rate each jurisdiction's road-maintenance performance based on:
@@ -356,7 +332,53 @@ Respond with ONLY valid JSON (no markdown, no code fences):
   "overall_assessment": "2-3 sentence overall assessment of municipal performance"
 }}
 """
-    raw = _call_gemini(prompt)
-    result = _parse_json_response(raw)
-    _set_cached("jurisdictions", result)
-    return result
+    raw = await _call_gemini(prompt)
+    return _parse_json_response(raw)
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+
+
+async def generate_summary(reports: ReportStore) -> dict:
+    """Executive summary: natural-language weekly report."""
+    return await _cached("summary", reports, _generate_summary)
+
+
+async def generate_trends(reports: ReportStore) -> dict:
+    """Trend analysis: emerging hotspots, worsening areas, time-based patterns."""
+    return await _cached("trends", reports, _generate_trends)
+
+
+async def generate_recommendations(reports: ReportStore) -> dict:
+    """Priority recommendations: ranked list of what to fix first."""
+    return await _cached("recommendations", reports, _generate_recommendations)
+
+
+async def generate_jurisdiction_scores(reports: ReportStore) -> dict:
+    """Jurisdiction scorecards: performance ratings per local authority."""
+    return await _cached("jurisdictions", reports, _generate_jurisdiction_scores)
+
+
+_GENERATORS = {
+    "summary": _generate_summary,
+    "trends": _generate_trends,
+    "recommendations": _generate_recommendations,
+    "jurisdictions": _generate_jurisdiction_scores,
+}
+
+
+async def generate_all(reports: ReportStore) -> AsyncIterator[tuple[str, dict | None, str | None]]:
+    """
+    All four insights, generated concurrently from one shared data summary.
+    Yields (section, result, error) as each one finishes.
+    """
+    data = _PromptData(reports)
+
+    async def one(kind: str) -> tuple[str, dict | None, str | None]:
+        try:
+            return kind, await _cached(kind, reports, _GENERATORS[kind], data), None
+        except Exception as e:
+            return kind, None, f"Insight generation failed: {e}"
+
+    for next_done in asyncio.as_completed([one(kind) for kind in _GENERATORS]):
+        yield await next_done
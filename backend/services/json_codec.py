@@ -0,0 +1,39 @@
+"""
+Fast JSON encoding for API responses.
+
+orjson serialises the report list several times faster than the stdlib
+encoder and yields bytes directly. Without it installed, encoding falls back
+to `json.dumps` with compact separators.
+
+Routes whose data is already plain JSON types (store reports, map
+clusters) return a FastJSONResponse or pre-encoded bytes themselves.
+FastAPI then skips both response-model validation and `jsonable_encoder`,
+which would walk every value again. Routes with a `response_model` keep FastAPI's own
+path: they validate, then serialise in pydantic-core, which is fast too.
+That only holds while no custom `default_response_class` is set, so this
+class is not made the app default.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, slower but equivalent output
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON for plain dict / list / str / number content."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
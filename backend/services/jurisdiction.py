@@ -2,9 +2,18 @@
 Simple coordinate-to-jurisdiction resolver for Malaysian local authorities.
 Maps GPS coordinates to the nearest known jurisdiction using state-level regions.
 Prototype only — replace with a proper reverse-geocoding API for production.
+
+Lookups go through precomputed grid indexes instead of scanning every entry:
+  * centroids are bucketed into 1° cells; each query cell memoizes the short
+    list of centroids that can lie within the 100 km cut-off of it
+  * boundary polygons registered with `add_boundary` are bucketed by their
+    bounding boxes and tested with point-in-polygon before the centroids
+`resolve_jurisdictions` resolves a list of points (bulk imports).
 """
 
 import math
+from collections import defaultdict
+from typing import Iterable
 
 # Each entry: (lat, long, jurisdiction_name)
 # Centroid-based approximations for Malaysian states / major cities.
@@ -56,18 +65,152 @@ _JURISDICTIONS = [
 ]
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Great-circle distance between two points in km."""
-    R = 6371.0
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(math.radians(lat1))
-        * math.cos(math.radians(lat2))
-        * math.sin(dlon / 2) ** 2
-    )
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+# ── Spatial index ────────────────────────────────────────────────────────────
+
+_EARTH_RADIUS_KM = 6371.0
+_MAX_DISTANCE_KM = 100.0
+_FALLBACK = "JKR Malaysia"
+_CELL_DEG = 1.0
+# Haversine `a` term at exactly _MAX_DISTANCE_KM
+_MAX_A = math.sin(_MAX_DISTANCE_KM / _EARTH_RADIUS_KM / 2) ** 2
+
+
+def _cell(lat: float, lng: float) -> tuple[int, int]:
+    return math.floor(lat / _CELL_DEG), math.floor(lng / _CELL_DEG)
+
+
+def _lng_reach_deg(abs_lat: float) -> float:
+    """
+    Max longitude difference (degrees) of any point within _MAX_DISTANCE_KM
+    of a point at latitude `abs_lat`. Standard bounding-box bound; 180 near
+    the poles.
+    """
+    ang = _MAX_DISTANCE_KM / _EARTH_RADIUS_KM
+    cos_lat = math.cos(math.radians(min(abs_lat, 90.0)))
+    if math.sin(ang) >= cos_lat:
+        return 180.0
+    return math.degrees(math.asin(math.sin(ang) / cos_lat))
+
+
+class _CentroidIndex:
+    """Uniform grid over jurisdiction centroids."""
+
+    def __init__(self, entries: list[tuple[float, float, str]]):
+        # (lat_rad, lng_rad, cos_lat, name) in original list order
+        self._points = [
+            (math.radians(lat), math.radians(lng), math.cos(math.radians(lat)), name)
+            for lat, lng, name in entries
+        ]
+        self._grid: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for i, (lat, lng, _) in enumerate(entries):
+            self._grid[_cell(lat, lng)].append(i)
+        self._candidates: dict[tuple[int, int], list[tuple]] = {}
+
+    def candidates(self, cell: tuple[int, int]) -> list[tuple]:
+        """Centroids that may be within the cut-off of any point in `cell`."""
+        cached = self._candidates.get(cell)
+        if cached is not None:
+            return cached
+
+        ci, cj = cell
+        lat0, lat1 = ci * _CELL_DEG, (ci + 1) * _CELL_DEG
+        dlat = math.degrees(_MAX_DISTANCE_KM / _EARTH_RADIUS_KM)
+        dlng = _lng_reach_deg(max(abs(lat0), abs(lat1)))
+        if dlng >= 180.0:
+            found = list(range(len(self._points)))
+        else:
+            i_range = range(_cell(lat0 - dlat, 0)[0], _cell(lat1 + dlat, 0)[0] + 1)
+            j_lo = math.floor((cj * _CELL_DEG - dlng) / _CELL_DEG)
+            j_hi = math.floor(((cj + 1) * _CELL_DEG + dlng) / _CELL_DEG)
+            found = sorted(
+                idx
+                for i in i_range
+                for j in range(j_lo, j_hi + 1)
+                for idx in self._grid.get((i, j), ())
+            )
+        # Keep original list order so ties resolve exactly as a full scan would
+        result = self._candidates[cell] = [self._points[idx] for idx in found]
+        return result
+
+    def nearest(self, lat: float, lng: float) -> str:
+        """Nearest centroid name, or the fallback if none is within the cut-off."""
+        candidates = self.candidates(_cell(lat, lng))
+        lat_r, lng_r = math.radians(lat), math.radians(lng)
+        cos_lat = math.cos(lat_r)
+        best_name = _FALLBACK
+        best_a = float("inf")
+        # Compare haversine `a` terms: monotonic in distance, no sqrt/atan2
+        for plat, plng, pcos, name in candidates:
+            a = (
+                math.sin((plat - lat_r) / 2) ** 2
+                + cos_lat * pcos * math.sin((plng - lng_r) / 2) ** 2
+            )
+            if a < best_a:
+                best_a = a
+                best_name = name
+        return best_name if best_a <= _MAX_A else _FALLBACK
+
+
+def _point_in_ring(lat: float, lng: float, ring: list[tuple[float, float]]) -> bool:
+    """Even-odd ray casting test; `ring` is a list of (lat, lng) vertices."""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        lat_i, lng_i = ring[i]
+        lat_j, lng_j = ring[j]
+        if (lat_i > lat) != (lat_j > lat):
+            cross = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+            if lng < cross:
+                inside = not inside
+        j = i
+    return inside
+
+
+class _BoundaryIndex:
+    """Grid of polygon bounding boxes (a flat R-tree) with point-in-polygon."""
+
+    def __init__(self):
+        self._polygons: list[tuple[str, list[tuple[float, float]], tuple]] = []
+        self._grid: dict[tuple[int, int], list[int]] = defaultdict(list)
+
+    def __bool__(self) -> bool:
+        return bool(self._polygons)
+
+    def add(self, name: str, ring: list[tuple[float, float]]) -> None:
+        lats = [p[0] for p in ring]
+        lngs = [p[1] for p in ring]
+        bbox = (min(lats), min(lngs), max(lats), max(lngs))
+        idx = len(self._polygons)
+        self._polygons.append((name, list(ring), bbox))
+        (i0, j0), (i1, j1) = _cell(bbox[0], bbox[1]), _cell(bbox[2], bbox[3])
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self._grid[(i, j)].append(idx)
+
+    def find(self, lat: float, lng: float) -> str | None:
+        """Name of the first registered boundary containing the point."""
+        for idx in self._grid.get(_cell(lat, lng), ()):
+            name, ring, (min_lat, min_lng, max_lat, max_lng) = self._polygons[idx]
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                if _point_in_ring(lat, lng, ring):
+                    return name
+        return None
+
+
+_centroids = _CentroidIndex(_JURISDICTIONS)
+_boundaries = _BoundaryIndex()
+
+
+def add_boundary(name: str, ring: list[tuple[float, float]]) -> None:
+    """
+    Register a jurisdiction boundary polygon as a list of (lat, lng)
+    vertices. Points inside a registered boundary resolve to it directly;
+    everything else falls back to the nearest centroid.
+    """
+    _boundaries.add(name, ring)
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
 
 
 def resolve_jurisdiction(lat: float, lng: float) -> str:
@@ -76,18 +219,16 @@ def resolve_jurisdiction(lat: float, lng: float) -> str:
     for the given GPS coordinates.
     Falls back to a generic label if nothing is within 100 km.
     """
-    best_name = "JKR Malaysia"
-    best_dist = float("inf")
-
-    for jlat, jlng, name in _JURISDICTIONS:
-        d = _haversine_km(lat, lng, jlat, jlng)
-        if d < best_dist:
-            best_dist = d
-            best_name = name
+    if _boundaries:
+        name = _boundaries.find(lat, lng)
+        if name is not None:
+            return name
+    return _centroids.nearest(lat, lng)
 
-    # If the nearest known point is > 100 km away, the coords are probably
-    # outside our coverage — return a generic fallback.
-    if best_dist > 100:
-        return "JKR Malaysia"
 
-    return best_name
+def resolve_jurisdictions(lats: Iterable[float], lngs: Iterable[float]) -> list[str]:
+    """
+    `resolve_jurisdiction` for each point, in input order. A convenience
+    for bulk imports; per point it costs the same as a single lookup.
+    """
+    return [resolve_jurisdiction(lat, lng) for lat, lng in zip(lats, lngs)]
@@ -0,0 +1,244 @@
+"""
+Model backends behind the shared Gemini client.
+
+GeminiClient (gemini_client) handles quota, retries, timeouts and circuit
+breakers. The call itself goes to the backend chosen by LLM_BACKEND:
+
+  gemini  Google Gemini via google-generativeai (needs GEMINI_API_KEY)
+  fake    local stand-in that answers with canned JSON after a simulated
+          delay and fails at a configured rate. It makes no network calls
+          and needs no key, so the full request path can be load-tested
+          offline.
+
+A backend has an awaitable `generate(contents, model)` that returns an
+LLMResult, and a `stats()` method. The google-generativeai SDK is imported
+only when the gemini backend is created.
+
+Fake backend settings:
+  FAKE_LLM_LATENCY_MS     median latency of a call
+  FAKE_LLM_LATENCY_SIGMA  spread of the log-normal latency distribution
+                          (0 = every call takes the median)
+  FAKE_LLM_ERROR_RATE     share of calls that fail with an error
+  FAKE_LLM_RATE_LIMIT_RATE share of calls that fail with a 429
+  FAKE_LLM_SEED           random seed; one seed and one call order always
+                          give the same latencies and failures
+  FAKE_LLM_RESPONSES      optional JSON file whose keys replace the canned
+                          answers (see _CANNED)
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+
+# Load .env before reading settings so it can pick the backend too
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+FAKE_LLM_RESPONSES = os.getenv("FAKE_LLM_RESPONSES", "")
+
+
+class LLMResult(NamedTuple):
+    text: str
+    tokens: int | None  # total tokens billed, if the backend reports it
+
+
+# ── Gemini ───────────────────────────────────────────────────────────────────
+
+
+class GeminiBackend:
+    """Google Gemini through `genai.GenerativeModel.generate_content_async`."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str | None = None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+        self._genai = genai
+        self._models: dict = {}
+
+    def _model(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            model = self._models[name] = self._genai.GenerativeModel(name)
+        return model
+
+    async def generate(self, contents, model: str) -> LLMResult:
+        response = await self._model(model).generate_content_async(contents)
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResult(
+            response.text or "", getattr(usage, "total_token_count", None) or None
+        )
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "models": sorted(self._models)}
+
+
+# ── Local stand-in ───────────────────────────────────────────────────────────
+
+
+class FakeLLMError(Exception):
+    """A failure injected by the fake backend."""
+
+
+# Answers by request kind, shaped like the ones the prompts ask for.
+# "analysis" is one image; a batched request gets one copy per image with
+# its "index" added.
+_CANNED: dict = {
+    "analysis": {
+        "is_pothole": True,
+        "size_category": "Medium",
+        "priority_color": "Yellow",
+        "estimated_duration": "1 day",
+        "jurisdiction": "DBKL Kuala Lumpur",
+    },
+    "summary": {
+        "title": "Weekly Infrastructure Report",
+        "date_range": "Last 7 days",
+        "overview": "Report volume is steady and most new potholes are analysed within minutes.",
+        "key_stats": [],
+        "highlights": ["Report volume is steady"],
+        "recommendations": ["Clear the oldest Red reports first"],
+    },
+    "trends": {
+        "emerging_hotspots": [],
+        "worsening_areas": [],
+        "positive_trends": [],
+        "daily_pattern": "Most reports arrive during commuting hours.",
+        "overall_direction": "stable",
+        "summary": "No significant change compared to the previous period.",
+    },
+    "recommendations": {
+        "priority_queue": [],
+        "clustering_insights": "No clusters large enough to batch.",
+        "resource_suggestion": "Keep the current crew allocation.",
+    },
+    "jurisdictions": {
+        "scorecards": [],
+        "best_performer": "",
+        "needs_attention": "",
+        "overall_assessment": "Performance is similar across jurisdictions.",
+    },
+    "default": {},
+}
+
+# Sizes picked for the default analysis, with matching priority and duration
+_SIZES = (
+    ("Small", "Green", "4 hours"),
+    ("Medium", "Yellow", "1 day"),
+    ("Large", "Red", "3 days"),
+)
+
+# A marker unique to each insight prompt's expected answer
+_INSIGHT_MARKERS = (
+    ("executive briefing", "summary"),
+    ('"emerging_hotspots"', "trends"),
+    ('"priority_queue"', "recommendations"),
+    ('"scorecards"', "jurisdictions"),
+)
+
+
+class FakeBackend:
+    """Canned answers after a log-normal delay, with injected failures."""
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_LLM_LATENCY_MS,
+        sigma: float = FAKE_LLM_LATENCY_SIGMA,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        rate_limit_rate: float = FAKE_LLM_RATE_LIMIT_RATE,
+        seed: int = FAKE_LLM_SEED,
+        responses: dict | None = None,
+    ):
+        self.latency = latency_ms / 1000
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.responses = {**_CANNED, **(responses or {})}
+        self._custom_analysis = bool(responses and "analysis" in responses)
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._latency_total = 0.0
+
+    async def generate(self, contents, model: str) -> LLMResult:
+        # Draw everything up front so outcomes follow the call order only
+        delay = self.latency * math.exp(self.sigma * self._random.gauss(0, 1))
+        roll = self._random.random()
+        self.calls += 1
+        self._latency_total += delay
+        await asyncio.sleep(delay)
+        if roll < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise FakeLLMError("429 Resource exhausted (injected by fake backend)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.errors += 1
+            raise FakeLLMError("Injected failure from fake backend")
+        return LLMResult(json.dumps(self._answer(contents)), None)
+
+    def _answer(self, contents):
+        parts = [contents] if isinstance(contents, str) else list(contents)
+        images = [p["data"] for p in parts if isinstance(p, dict)]
+        if len(images) > 1:
+            return [{**self._analysis(data), "index": i} for i, data in enumerate(images)]
+        if images:
+            return self._analysis(images[0])
+        prompt = "".join(p for p in parts if isinstance(p, str))
+        for marker, kind in _INSIGHT_MARKERS:
+            if marker in prompt:
+                return self.responses[kind]
+        return self.responses["default"]
+
+    def _analysis(self, image: bytes) -> dict:
+        """The canned analysis; by default the size follows the image's hash."""
+        if self._custom_analysis:
+            return self.responses["analysis"]
+        size, color, duration = _SIZES[hashlib.sha1(image).digest()[0] % len(_SIZES)]
+        return {
+            **self.responses["analysis"],
+            "size_category": size,
+            "priority_color": color,
+            "estimated_duration": duration,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "avg_latency_ms": round(1000 * self._latency_total / self.calls, 1)
+            if self.calls
+            else 0.0,
+        }
+
+
+def _load_responses(path: str) -> dict | None:
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def create_backend(name: str = LLM_BACKEND):
+    """The backend named by LLM_BACKEND (`gemini` or `fake`)."""
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "fake":
+        return FakeBackend(responses=_load_responses(FAKE_LLM_RESPONSES))
+    raise ValueError(f"Unknown LLM_BACKEND {name!r} (expected 'gemini' or 'fake')")
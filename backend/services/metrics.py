@@ -0,0 +1,197 @@
+"""
+In-process metrics rendered in the Prometheus text format (GET /metrics).
+
+Recording is meant to stay on under full load, so it costs a dict lookup
+and an addition. Counters, gauges and histograms keep one plain value (or
+bucket list) per label tuple. Callers pass label values as a tuple in the
+declared order, and a new tuple creates its series on first use. No locks
+are taken: every recorder runs on the event loop. Cumulative histogram
+buckets and all text formatting happen only when /metrics is scraped.
+
+State that other components already keep (quota queue, circuit states,
+insight cache counters, store size) is not copied on every change. It is
+read at scrape time through `registry.callback`.
+"""
+
+import bisect
+import math
+from typing import Callable
+
+# Latency buckets in seconds; +Inf is implied
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+GEMINI_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic total per label tuple."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_number(v)}"
+            for k, v in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down (in-flight requests and the like)."""
+
+    type = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, labels: tuple, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label tuple, plus their sum and count."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = HTTP_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label tuple -> per-bucket counts (last one is +Inf), then the sum
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def label_sets(self) -> list[tuple]:
+        """Label tuples observed so far."""
+        return list(self._series)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        bounds = (*self.buckets, math.inf)
+        for key, series in self._series.items():
+            total = 0
+            for bound, count in zip(bounds, series):
+                total += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.label_names, key, le)} {total}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {total}")
+        return lines
+
+
+class _Callback(_Metric):
+    """Values read from elsewhere when scraped: fn() -> {label tuple: value}."""
+
+    def __init__(self, name, help, type, labels, fn: Callable[[], dict]):
+        super().__init__(name, help, labels)
+        self.type = type
+        self._fn = fn
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_number(v)}"
+            for k, v in self._fn().items()
+        ]
+
+
+class Registry:
+    """Named metrics, rendered together in registration order."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = HTTP_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def callback(
+        self,
+        name: str,
+        help: str,
+        fn: Callable[[], dict],
+        labels: tuple[str, ...] = (),
+        type: str = "gauge",
+    ) -> None:
+        """Register a metric whose values `fn` returns at scrape time."""
+        self._add(_Callback(name, help, type, labels, fn))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry behind GET /metrics
+registry = Registry()
@@ -0,0 +1,246 @@
+"""
+Live aggregates over the report store for the insights engine.
+
+ReportAggregates subscribes to store changes and keeps every number that
+`insights_service._build_data_summary` needs: counts by priority / status /
+size, per-jurisdiction totals, and daily buckets, so building a summary no
+longer walks the reports. Each create or update adjusts them in O(1).
+
+Age-based figures (average age, overdue counts) depend on "now", so they are
+derived at summary time. Average ages come from running timestamp sums.
+Overdue counts come from "Reported" reports bucketed by the hour of their
+timestamp (_Overdue). The first overdue ids are read from the store's
+status index, in store order, stopping after 20.
+
+The output matches the full scan it replaced. Open reports with an
+unparseable timestamp count as age 0 in a jurisdiction's average.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from store import ReportStore
+
+_OVERDUE_HOURS = 24
+_OVERDUE_IDS = 20
+
+
+def _parse_ts(report: dict) -> datetime | None:
+    try:
+        return datetime.fromisoformat(report["timestamp"])
+    except Exception:
+        return None
+
+
+class _Overdue:
+    """
+    "Reported" reports by the hour of their timestamp, plus a running count
+    of those in the hours before the last cutoff asked for. Adding or
+    removing a report is O(1). Counting adds the hours the cutoff moved
+    past since the previous call, then checks the reports in the cutoff's
+    own hour one by one.
+    """
+
+    __slots__ = ("hours", "counted_before", "counted")
+
+    def __init__(self):
+        self.hours: dict[int, dict[str, float]] = {}  # hour -> {id: timestamp}
+        self.counted_before: int | None = None
+        self.counted = 0  # reports in hours < counted_before
+
+    def apply(self, report_id: str, epoch: float, sign: int) -> None:
+        hour = int(epoch // 3600)
+        if sign > 0:
+            self.hours.setdefault(hour, {})[report_id] = epoch
+        else:
+            reports = self.hours.get(hour)
+            if reports is None or reports.pop(report_id, None) is None:
+                return
+            if not reports:
+                del self.hours[hour]
+        if self.counted_before is not None and hour < self.counted_before:
+            self.counted += sign
+
+    def count(self, cutoff: float) -> int:
+        """Reports with a timestamp before `cutoff`."""
+        hour = int(cutoff // 3600)
+        if self.counted_before is None:
+            self.counted = sum(len(r) for h, r in self.hours.items() if h < hour)
+        elif hour != self.counted_before:
+            lo, hi = sorted((self.counted_before, hour))
+            if hi - lo <= len(self.hours):
+                moved = sum(len(self.hours.get(h, ())) for h in range(lo, hi))
+            else:
+                moved = sum(len(r) for h, r in self.hours.items() if lo <= h < hi)
+            self.counted += moved if hour > self.counted_before else -moved
+        self.counted_before = hour
+        edge = self.hours.get(hour, {})
+        return self.counted + sum(1 for ts in edge.values() if ts < cutoff)
+
+
+class _JurisdictionStats:
+    __slots__ = (
+        "total",
+        "finished",
+        "red",
+        "open_count",
+        "open_dated",
+        "open_ts_sum",
+        "overdue",
+    )
+
+    def __init__(self):
+        self.total = 0
+        self.finished = 0
+        self.red = 0
+        self.open_count = 0  # non-Finished reports
+        self.open_dated = 0  # ... of which have a valid timestamp
+        self.open_ts_sum = 0.0
+        self.overdue = _Overdue()
+
+
+class ReportAggregates:
+    """Incrementally maintained summary statistics for one ReportStore."""
+
+    def __init__(self, store: ReportStore):
+        self._store = store
+        self._built = False
+        store.subscribe(self._on_change)
+
+    def _reset(self) -> None:
+        self.total = 0
+        self.priority: dict[str, int] = defaultdict(int)
+        self.status: dict[str, int] = defaultdict(int)
+        self.size: dict[str, int] = defaultdict(int)
+        self.ts_count = 0
+        self.ts_sum = 0.0
+        self.overdue = _Overdue()
+        self.jurisdictions: dict[str, _JurisdictionStats] = defaultdict(
+            _JurisdictionStats
+        )
+        self.daily_reported: dict[str, int] = defaultdict(int)
+        self.daily_finished: dict[str, int] = defaultdict(int)
+
+    def _ensure_built(self) -> None:
+        # Built on first use (one pass) so opening the store stays lazy
+        if not self._built:
+            self._reset()
+            for report in self._store:
+                self._apply(report, +1)
+            self._built = True
+
+    def _on_change(self, event: str, report: dict, previous: dict | None) -> None:
+        if not self._built:
+            return
+        if event == "deleted":
+            self._apply(report, -1)
+            return
+        if previous:
+            self._apply({**report, **previous}, -1)
+        self._apply(report, +1)
+
+    def _apply(self, r: dict, sign: int) -> None:
+        """Add (sign=+1) or remove (sign=-1) one report's contribution."""
+        status = r.get("status", "Reported")
+        jur = r.get("jurisdiction", "Unknown")
+        self.total += sign
+        self.priority[r.get("priority_color", "Green")] += sign
+        self.status[status] += sign
+        self.size[r.get("size_category", "Small")] += sign
+
+        j = self.jurisdictions[jur]
+        j.total += sign
+        if status == "Finished":
+            j.finished += sign
+        if r.get("priority_color") == "Red":
+            j.red += sign
+        if status != "Finished":
+            j.open_count += sign
+
+        ts = _parse_ts(r)
+        if ts is not None:
+            epoch = ts.timestamp()
+            self.ts_count += sign
+            self.ts_sum += sign * epoch
+            day_str = ts.strftime("%Y-%m-%d")
+            self.daily_reported[day_str] += sign
+            if status == "Finished":
+                self.daily_finished[day_str] += sign
+            else:
+                j.open_dated += sign
+                j.open_ts_sum += sign * epoch
+            if status == "Reported":
+                self.overdue.apply(r["id"], epoch, sign)
+                j.overdue.apply(r["id"], epoch, sign)
+
+        if j.total == 0:
+            del self.jurisdictions[jur]
+
+    def summary(self, now: datetime | None = None) -> dict:
+        """The data summary sent to Gemini, in `_build_data_summary` format."""
+        self._ensure_built()
+        now = now or datetime.now(timezone.utc)
+        now_ts = now.timestamp()
+        cutoff = now_ts - _OVERDUE_HOURS * 3600
+
+        def nonzero(counts: dict[str, int]) -> dict[str, int]:
+            return {k: v for k, v in counts.items() if v}
+
+        total = self.total
+        finished = self.status.get("Finished", 0)
+        overdue_count = self.overdue.count(cutoff)
+        avg_age_h = (
+            round((now_ts - self.ts_sum / self.ts_count) / 3600, 1)
+            if self.ts_count
+            else 0
+        )
+
+        jurisdiction_summaries = {}
+        for jur, j in self.jurisdictions.items():
+            # Undated open reports add age 0, as the full scan did
+            j_avg_response = (
+                round((j.open_dated * now_ts - j.open_ts_sum) / j.open_count / 3600, 1)
+                if j.open_count
+                else 0
+            )
+            jurisdiction_summaries[jur] = {
+                "total": j.total,
+                "finished": j.finished,
+                "red": j.red,
+                "overdue": j.overdue.count(cutoff),
+                "resolution_rate": round(j.finished / j.total * 100, 1),
+                "avg_open_hours": j_avg_response,
+            }
+
+        return {
+            "total_reports": total,
+            "priority": nonzero(self.priority),
+            "status": nonzero(self.status),
+            "size": nonzero(self.size),
+            "resolution_rate": round(finished / total * 100, 1) if total else 0,
+            "avg_age_hours": avg_age_h,
+            "overdue_count": overdue_count,
+            "overdue_ids": self._overdue_ids(cutoff, min(overdue_count, _OVERDUE_IDS)),
+            "jurisdiction_count": len(self.jurisdictions),
+            "jurisdictions": jurisdiction_summaries,
+            "daily_reported": nonzero(self.daily_reported),
+            "daily_finished": nonzero(self.daily_finished),
+        }
+
+    def _overdue_ids(self, cutoff: float, limit: int) -> list[str]:
+        """The first `limit` overdue ids in store order."""
+        ids = []
+        if limit:
+            # Older reports come first, so this usually stops after `limit`
+            for _, report in self._store.query(status="Reported"):
+                ts = _parse_ts(report)
+                if ts is not None and ts.timestamp() < cutoff:
+                    ids.append(report["id"])
+                    if len(ids) == limit:
+                        break
+        return ids
+
+
+def aggregates_for(store: ReportStore) -> ReportAggregates:
+    """The (lazily created) live aggregates attached to `store`."""
+    return store.listener("aggregates", ReportAggregates)
@@ -0,0 +1,318 @@
+"""
+Report ingestion: building new report records and bulk archive imports.
+
+`new_report` is the single place a submitted report is assembled, for both
+POST /api/reports and the bulk endpoint. Reports start as "Reported" with
+placeholder analysis fields and are handed to the background analysis
+workers.
+
+`import_archive` ingests a zip or tar of images plus an NDJSON manifest
+(one {"file", "lat", "long"} object per line, either uploaded alongside or
+stored in the archive as manifest.ndjson). Jurisdictions for the whole
+manifest are resolved in one batch. Entries are read in archive order in
+chunks of _CHUNK. Each chunk is preprocessed in parallel on the image pool
+and stored with one `add_many`, then queued for analysis in the BULK class,
+so citizen submissions are analysed ahead of a large import. Progress comes
+back as one dict per item.
+"""
+
+import asyncio
+import io
+import json
+import mimetypes
+import tarfile
+import zipfile
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, BinaryIO
+
+from middleware.upload_limit import MAX_UPLOAD_BYTES
+from services.analysis_worker import (
+    ANALYSIS_FIELDS,
+    DEFAULT_ANALYSIS,
+    analysis_workers,
+)
+from services.blob_store import blobs
+from services.gemini_quota import Priority
+from services.image_preprocess import PreprocessedImage, preprocessor
+from services.jurisdiction import resolve_jurisdictions
+from store import ReportStore, next_id
+
+MANIFEST_NAME = "manifest.ndjson"
+
+# Entries preprocessed and stored together
+_CHUNK = 32
+
+
+class ArchiveError(ValueError):
+    """The archive or manifest cannot be used at all (maps to a 422)."""
+
+
+def new_report(
+    lat: float,
+    lng: float,
+    image: PreprocessedImage,
+    image_sha256: str,
+    jurisdiction: str,
+) -> dict:
+    """A fresh "Reported" report awaiting background analysis."""
+    now_iso = datetime.now(timezone.utc).isoformat()
+    report_id = next_id()
+    return {
+        "id": report_id,
+        "user_lat": lat,
+        "user_long": lng,
+        "image_file": f"/api/reports/{report_id}/image",
+        "image_sha256": image_sha256,
+        "image_mime": image.mime_type,
+        "image_dhash": image.dhash,
+        "timestamp": now_iso,
+        # Placeholders until the analysis worker fills them in
+        **{field: DEFAULT_ANALYSIS[field] for field in ANALYSIS_FIELDS},
+        # Always resolve jurisdiction from coordinates (more reliable than Gemini)
+        "jurisdiction": jurisdiction,
+        "status": "Reported",
+        "status_history": [
+            {"status": "Reported", "at": now_iso},
+        ],
+        "analysis_pending": True,
+    }
+
+
+# ── Archives ─────────────────────────────────────────────────────────────────
+
+# Corrupt or truncated archives: bad headers, CRC mismatches, short reads
+_READ_ERRORS = (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError, zlib.error)
+
+
+class _Archive:
+    """Read-only access to the members of a zip or tar file by name."""
+
+    def __init__(self, source: BinaryIO):
+        source.seek(0)
+        try:
+            if zipfile.is_zipfile(source):
+                source.seek(0)
+                self._zip = zipfile.ZipFile(source)
+                self._tar = None
+                self._sizes = {
+                    info.filename: info.file_size
+                    for info in self._zip.infolist()
+                    if not info.is_dir()
+                }
+            else:
+                source.seek(0)
+                self._tar = tarfile.open(fileobj=source, mode="r:*")
+                self._zip = None
+                self._members = {
+                    m.name: m for m in self._tar.getmembers() if m.isfile()
+                }
+                self._sizes = {name: m.size for name, m in self._members.items()}
+        except _READ_ERRORS as e:
+            raise ArchiveError(f"Archive must be a readable zip or tar file: {e}")
+
+    def order(self, name: str) -> int:
+        """Position of a member, so entries are read front to back."""
+        if self._zip is not None:
+            return self._zip.getinfo(name).header_offset
+        return self._members[name].offset
+
+    def size(self, name: str) -> int | None:
+        return self._sizes.get(name)
+
+    def read(self, name: str) -> bytes:
+        if self._zip is not None:
+            return self._zip.read(name)
+        return self._tar.extractfile(self._members[name]).read()
+
+    def read_many(self, names: list[str]) -> list[bytes | Exception]:
+        """Member contents, or the error that stopped one being read."""
+        datas = []
+        for name in names:
+            try:
+                datas.append(self.read(name))
+            except _READ_ERRORS as e:
+                datas.append(e)
+        return datas
+
+    def close(self) -> None:
+        (self._zip or self._tar).close()
+
+
+def _parse_manifest(lines: list[bytes]) -> list[dict]:
+    """
+    One entry per non-blank line. Bad lines are kept as entries carrying an
+    "error" so the result stream still reports them by index.
+    """
+    entries = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            entries.append({"file": None, "error": "Manifest line is not valid JSON."})
+            continue
+        if not isinstance(item, dict):
+            entries.append({"file": None, "error": "Manifest line must be an object."})
+            continue
+        try:
+            entry = {
+                "file": str(item["file"]),
+                "lat": float(item["lat"]),
+                "long": float(item["long"] if "long" in item else item["lng"]),
+            }
+            if not (-90 <= entry["lat"] <= 90 and -180 <= entry["long"] <= 180):
+                raise ValueError("coordinates out of range")
+        except (KeyError, TypeError, ValueError) as e:
+            entry = {"file": item.get("file"), "error": f"Invalid manifest line: {e}"}
+        entries.append(entry)
+    return entries
+
+
+def _load(archive_file: BinaryIO, manifest_file: BinaryIO | None):
+    archive = _Archive(archive_file)
+    if manifest_file is not None:
+        manifest_file.seek(0)
+        lines = manifest_file.read().splitlines()
+    elif archive.size(MANIFEST_NAME) is not None:
+        try:
+            lines = archive.read(MANIFEST_NAME).splitlines()
+        except _READ_ERRORS as e:
+            archive.close()
+            raise ArchiveError(f"Cannot read {MANIFEST_NAME} from the archive: {e}")
+    else:
+        archive.close()
+        raise ArchiveError(
+            f"No manifest: upload one or include {MANIFEST_NAME} in the archive."
+        )
+    return archive, _parse_manifest(lines)
+
+
+# ── Import ───────────────────────────────────────────────────────────────────
+
+
+async def import_archive(
+    store: ReportStore,
+    archive_file: BinaryIO,
+    manifest_file: BinaryIO | None = None,
+    wait: bool = False,
+) -> AsyncIterator[dict]:
+    """
+    Ingest every manifest entry and yield one result per item:
+      {"index", "file", "id", "status": "Reported"}  stored and queued
+      {"index", "file", "error"}                       skipped
+    With `wait`, an {"index", "file", "id", "status", <analysis fields>}
+    line follows for each item as its analysis completes. A final
+    {"done": true, "accepted", "failed"} closes the stream.
+
+    Raises ArchiveError before yielding anything if the upload is unusable.
+    """
+    archive, entries = await asyncio.to_thread(_load, archive_file, manifest_file)
+    try:
+        valid = [i for i, e in enumerate(entries) if "error" not in e]
+        jurisdictions = dict(
+            zip(
+                valid,
+                resolve_jurisdictions(
+                    [entries[i]["lat"] for i in valid],
+                    [entries[i]["long"] for i in valid],
+                ),
+            )
+        )
+
+        # Read members in archive order; report results against manifest order
+        readable = []
+        for i in valid:
+            size = archive.size(entries[i]["file"])
+            if size is None:
+                entries[i]["error"] = "File not found in archive."
+            elif size > MAX_UPLOAD_BYTES:
+                entries[i]["error"] = f"File exceeds {MAX_UPLOAD_BYTES} bytes."
+            else:
+                readable.append(i)
+        readable.sort(key=lambda i: archive.order(entries[i]["file"]))
+
+        accepted = 0
+        pending: dict[asyncio.Future, int] = {}
+        for i, entry in enumerate(entries):
+            if "error" in entry:
+                yield {"index": i, "file": entry["file"], "error": entry["error"]}
+
+        for start in range(0, len(readable), _CHUNK):
+            chunk = readable[start : start + _CHUNK]
+            names = [entries[i]["file"] for i in chunk]
+            datas = await asyncio.to_thread(archive.read_many, names)
+            read = []
+            for i, data in zip(chunk, datas):
+                if isinstance(data, Exception):
+                    error = f"Cannot read file from archive: {data}"
+                    yield {"index": i, "file": entries[i]["file"], "error": error}
+                else:
+                    read.append((i, data))
+            images = await asyncio.gather(
+                *(
+                    preprocessor.process(io.BytesIO(data), _guess_mime(entries[i]["file"]))
+                    for i, data in read
+                )
+            )
+            indices = [i for i, _ in read]
+            del datas, read
+
+            batch = []
+            for i, image in zip(indices, images):
+                entry = entries[i]
+                if image.data is None:
+                    yield {"index": i, "file": entry["file"], "error": "Not a readable image."}
+                    continue
+                sha = await asyncio.to_thread(blobs.put, image.data)
+                report = new_report(
+                    entry["lat"], entry["long"], image, sha, jurisdictions[i]
+                )
+                batch.append((i, report))
+            store.add_many([report for _, report in batch])
+
+            for i, report in batch:
+                accepted += 1
+                future = analysis_workers.enqueue(report["id"], Priority.BULK)
+                if wait:
+                    pending[future] = i
+                yield {
+                    "index": i,
+                    "file": entries[i]["file"],
+                    "id": report["id"],
+                    "status": report["status"],
+                }
+
+            # Interleave analyses that finished while this chunk was ingested
+            for future in [f for f in pending if f.done()]:
+                yield _analysed(entries, pending.pop(future), future.result())
+
+        while pending:
+            finished, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in finished:
+                yield _analysed(entries, pending.pop(future), future.result())
+
+        yield {"done": True, "accepted": accepted, "failed": len(entries) - accepted}
+    finally:
+        archive.close()
+
+
+def _guess_mime(name: str) -> str:
+    mime_type, _ = mimetypes.guess_type(name)
+    return mime_type if mime_type and mime_type.startswith("image/") else "image/jpeg"
+
+
+def _analysed(entries: list[dict], index: int, report: dict | None) -> dict:
+    file = entries[index]["file"]
+    if report is None:
+        return {"index": index, "file": file, "error": "Analysis failed."}
+    return {
+        "index": index,
+        "file": file,
+        "id": report["id"],
+        "status": report["status"],
+        **{field: report[field] for field in (*ANALYSIS_FIELDS, "jurisdiction")},
+    }
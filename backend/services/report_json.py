@@ -0,0 +1,75 @@
+"""
+Pre-serialised JSON for reports in list responses.
+
+Most reports don't change between two dashboard polls, but every poll used
+to encode every report again. ReportJSONCache keeps the encoded public
+fields of each report, keyed by id, and drops an entry when the store
+reports a write to that report (status changes, analysis results,
+deletions). The next read re-encodes only that report. A list body is the
+cached fragments joined with commas, so repeated reads cost about a
+dictionary lookup per report.
+
+Fragments are created on first read, so memory follows the reports that
+were actually served. At most REPORT_JSON_CACHE_SIZE are kept; the least
+recently served are evicted first.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Iterable
+
+from schemas.response_model import PotholeReportModel
+from services.json_codec import dumps
+from store import ReportStore
+
+# Fields clients may see / project; internal keys (blob hash etc.) stay hidden
+PUBLIC_FIELDS = tuple(PotholeReportModel.model_fields)
+
+REPORT_JSON_CACHE_SIZE = int(os.getenv("REPORT_JSON_CACHE_SIZE", "50000"))
+
+
+class ReportJSONCache:
+    """LRU of encoded public fields per report id, invalidated by store writes."""
+
+    def __init__(
+        self,
+        store: ReportStore,
+        fields: tuple[str, ...] = PUBLIC_FIELDS,
+        max_entries: int = REPORT_JSON_CACHE_SIZE,
+    ):
+        self.fields = fields
+        self.max_entries = max_entries
+        # report id -> fragment; order is least to most recently served
+        self._fragments: OrderedDict[str, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        store.subscribe(self._on_change)
+
+    def _on_change(self, event: str, report: dict, previous: dict | None) -> None:
+        self._fragments.pop(report["id"], None)
+
+    def fragment(self, report: dict) -> bytes:
+        """The report's public fields as a JSON object."""
+        data = self._fragments.get(report["id"])
+        if data is None:
+            self.misses += 1
+            data = dumps({k: report[k] for k in self.fields if k in report})
+            self._fragments[report["id"]] = data
+            if len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        else:
+            self.hits += 1
+            self._fragments.move_to_end(report["id"])
+        return data
+
+    def encode_list(self, reports: Iterable[dict]) -> bytes:
+        """A JSON array of the reports' public fields."""
+        return b"[" + b",".join(map(self.fragment, reports)) + b"]"
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._fragments)}
+
+
+def report_json_for(store: ReportStore) -> ReportJSONCache:
+    """The (lazily created) serialised-report cache attached to `store`."""
+    return store.listener("report_json", ReportJSONCache)
@@ -0,0 +1,72 @@
+"""
+Per-report revisions for delta sync of GET /api/reports.
+
+ReportRevisions listens to the store. For every report written since the
+process started, it records the store version of the latest write, with
+deleted reports kept apart as tombstones. `changed_since(version)` walks
+back from the newest write and stops at the client's version. A periodic
+refresh therefore costs time and bytes in proportion to what changed, not
+to the size of the store.
+
+Reports untouched since startup have no entry. They predate every version
+token a client of this run can hold, because tokens carry the store epoch.
+Only the last DELTA_TOMBSTONES deletions are remembered. A client that
+synced before the oldest forgotten tombstone has to reload in full.
+"""
+
+import os
+from collections import OrderedDict
+from itertools import takewhile
+
+from store import ReportStore
+
+DELTA_TOMBSTONES = int(os.getenv("DELTA_TOMBSTONES", "10000"))
+
+
+class ReportRevisions:
+    """Latest write version per report id, plus recent tombstones."""
+
+    def __init__(self, store: ReportStore, max_tombstones: int = DELTA_TOMBSTONES):
+        self._store = store
+        self.max_tombstones = max_tombstones
+        # id -> version of its latest write; order is oldest to newest write
+        self._live: OrderedDict[str, int] = OrderedDict()
+        self._deleted: OrderedDict[str, int] = OrderedDict()
+        # Deltas from versions before this can no longer list every deletion
+        self.horizon = 0
+        store.subscribe(self._on_change)
+
+    def _on_change(self, event: str, report: dict, previous: dict | None) -> None:
+        report_id = report["id"]
+        version = self._store.version
+        if event == "deleted":
+            self._live.pop(report_id, None)
+            self._deleted[report_id] = version
+            while len(self._deleted) > self.max_tombstones:
+                _, self.horizon = self._deleted.popitem(last=False)
+            return
+        self._deleted.pop(report_id, None)
+        self._live[report_id] = version
+        self._live.move_to_end(report_id)
+
+    def changed_since(self, version: int) -> tuple[list[str], list[str]] | None:
+        """
+        (ids created or updated, ids deleted) after `version`, each oldest
+        write first. None if the version is too old (or newer than the
+        store) for the delta to be complete.
+        """
+        if version < self.horizon or version > self._store.version:
+            return None
+
+        def after(revisions: OrderedDict[str, int]) -> list[str]:
+            newest_first = takewhile(
+                lambda item: item[1] > version, reversed(revisions.items())
+            )
+            return [report_id for report_id, _ in newest_first][::-1]
+
+        return after(self._live), after(self._deleted)
+
+
+def revisions_for(store: ReportStore) -> ReportRevisions:
+    """The (lazily created) revision tracker attached to `store`."""
+    return store.listener("revisions", ReportRevisions)
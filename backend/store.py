@@ -1,22 +1,343 @@
 """
-In-memory report store for prototype.
+Report store for prototype.
 Will be replaced by Firebase in production.
+
+`reports` is a ReportStore chosen by the REPORT_STORE env var:
+  sqlite (default) — persisted in REPORT_DB_PATH, see store_sqlite.py
+  memory           — MemoryReportStore, reset to the seed data on restart
+Both index status, priority_color and jurisdiction so that lookups,
+updates and filtered reads never scan the whole collection.
 """
 
+import heapq
+import os
 import uuid
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, TypeVar
+
+
+_T = TypeVar("_T")
 
 
 def next_id() -> str:
     return str(uuid.uuid4())[:8]
 
 
+# ── Report store ─────────────────────────────────────────────────────────────
+
+
+class ReportStore(ABC):
+    """
+    Interface shared by the report store backends.
+
+    Every report has a sequence number that orders query results and
+    doubles as a pagination cursor. Filters on the indexed fields take a
+    single value or an iterable of accepted values. Backends implement the
+    `_add` / `_add_many` / `_update` / `_delete` primitives; this class
+    notifies change listeners and builds status changes on top of them.
+    """
+
+    INDEXED_FIELDS = ("status", "priority_color", "jurisdiction")
+
+    def __init__(self):
+        self._listeners: list[Callable[[str, dict, dict | None], None]] = []
+        # Live views kept up to date from change events, by kind
+        self._views: dict[str, object] = {}
+        # Bumped on every write; lets caches tell whether the data changed
+        self.version = 0
+        # Versions restart with the process; the epoch tells runs apart
+        self.epoch = uuid.uuid4().hex[:8]
+
+    def subscribe(self, listener: Callable[[str, dict, dict | None], None]) -> None:
+        """
+        Call `listener(event, report, previous)` after every write.
+        `event` is "created", "updated" or "deleted"; for updates,
+        `previous` maps each changed field to its old value. Writes happen
+        on the event loop thread, so listeners run there too.
+        """
+        self._listeners.append(listener)
+
+    def listener(self, kind: str, factory: Callable[["ReportStore"], _T]) -> _T:
+        """
+        The live view of `kind` attached to this store (aggregates, change
+        feed, ...), created as `factory(self)` on first use. The factory
+        subscribes the view to the store, so it lives as long as the store.
+        """
+        view = self._views.get(kind)
+        if view is None:
+            view = self._views[kind] = factory(self)
+        return view
+
+    def version_token(self, version: int | None = None) -> str:
+        """`version` (default: current) as "<epoch>:<version>" for clients."""
+        return f"{self.epoch}:{self.version if version is None else version}"
+
+    def parse_version_token(self, token: str) -> int | None:
+        """Version from a token, or None if malformed or from another run."""
+        epoch, _, version = token.partition(":")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def _notify(self, event: str, report: dict, previous: dict | None) -> None:
+        self.version += 1
+        for listener in self._listeners:
+            listener(event, report, previous)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[dict]:
+        ...
+
+    def __contains__(self, report_id: object) -> bool:
+        return self.get(report_id) is not None
+
+    @abstractmethod
+    def get(self, report_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def values(self, field: str) -> list[str]:
+        """Distinct values currently present for an indexed field."""
+
+    @abstractmethod
+    def query(
+        self,
+        *,
+        status: str | Iterable[str] | None = None,
+        priority_color: str | Iterable[str] | None = None,
+        jurisdiction: str | Iterable[str] | None = None,
+        after: int = -1,
+    ) -> Iterator[tuple[int, dict]]:
+        """
+        Yield (seq, report) pairs matching all given filters, in insertion
+        order, starting after sequence number `after`.
+        """
+
+    @abstractmethod
+    def count(self, **filters) -> int:
+        """Number of reports matching `query(**filters)`."""
+
+    def add(self, report: dict) -> dict:
+        """Insert a new report."""
+        self._add(report)
+        self._notify("created", report, None)
+        return report
+
+    def add_many(self, reports: Iterable[dict]) -> list[dict]:
+        """Insert several reports; backends may batch the writes."""
+        reports = self._add_many(list(reports))
+        for report in reports:
+            self._notify("created", report, None)
+        return reports
+
+    def update(self, report_id: str, **changes) -> dict | None:
+        """Apply field changes to a report. Returns None if it doesn't exist."""
+        result = self._update(report_id, changes)
+        if result is None:
+            return None
+        report, previous = result
+        self._notify("updated", report, previous)
+        return report
+
+    def delete(self, report_id: str) -> dict | None:
+        """Remove a report. Returns the removed report, or None if missing."""
+        report = self._delete(report_id)
+        if report is not None:
+            self._notify("deleted", report, None)
+        return report
+
+    def set_status(self, report_id: str, status: str, at: str | None = None) -> dict | None:
+        """Change a report's status and append it to its status_history."""
+        report = self.get(report_id)
+        if report is None:
+            return None
+        history = list(report.get("status_history", []))
+        history.append(
+            {"status": status, "at": at or datetime.now(timezone.utc).isoformat()}
+        )
+        return self.update(report_id, status=status, status_history=history)
+
+    def flush(self) -> None:
+        """Make pending writes durable. No-op for the in-memory backend."""
+
+    # ── Backend primitives ──
+
+    @abstractmethod
+    def _add(self, report: dict) -> None:
+        ...
+
+    def _add_many(self, reports: list[dict]) -> list[dict]:
+        for report in reports:
+            self._add(report)
+        return reports
+
+    @abstractmethod
+    def _update(self, report_id: str, changes: dict) -> tuple[dict, dict] | None:
+        """Apply `changes`; return (report, {field: old value}) or None."""
+
+    @abstractmethod
+    def _delete(self, report_id: str) -> dict | None:
+        """Remove a report and return it, or None if it doesn't exist."""
+
+    @staticmethod
+    def _filters(**filters) -> dict[str, set]:
+        """Normalise query filters to {field: accepted values}, dropping None."""
+        return {
+            field: {values} if isinstance(values, str) else set(values)
+            for field, values in filters.items()
+            if values is not None
+        }
+
+
+class MemoryReportStore(ReportStore):
+    """
+    Indexed in-memory report collection.
+
+    A report's sequence number is its insertion position. Each indexed
+    field maps value -> sorted list of sequence numbers, so a filtered read
+    costs O(log n + matches) and an update costs O(log n).
+
+    Reports handed out by the store are live dicts: change them only through
+    `update` / `set_status` so the indexes stay consistent. A deleted
+    report leaves a None hole at its position so sequence numbers never move.
+    """
+
+    def __init__(self, reports: Iterable[dict] = ()):
+        super().__init__()
+        self._by_id: dict[str, dict] = {}
+        self._seq_of: dict[str, int] = {}
+        self._order: list[dict] = []
+        self._index: dict[str, dict[str, list[int]]] = {
+            field: defaultdict(list) for field in self.INDEXED_FIELDS
+        }
+        for report in reports:
+            self.add(report)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (report for report in self._order if report is not None)
+
+    def __contains__(self, report_id: object) -> bool:
+        return report_id in self._by_id
+
+    def get(self, report_id: str) -> dict | None:
+        return self._by_id.get(report_id)
+
+    def values(self, field: str) -> list[str]:
+        return [v for v, seqs in self._index[field].items() if seqs]
+
+    def query(
+        self,
+        *,
+        status: str | Iterable[str] | None = None,
+        priority_color: str | Iterable[str] | None = None,
+        jurisdiction: str | Iterable[str] | None = None,
+        after: int = -1,
+    ) -> Iterator[tuple[int, dict]]:
+        """
+        The most selective indexed filter drives the scan; the remaining
+        ones are checked against the candidate report directly.
+        """
+        filters = self._filters(
+            status=status, priority_color=priority_color, jurisdiction=jurisdiction
+        )
+
+        if not filters:
+            for seq in range(after + 1, len(self._order)):
+                if self._order[seq] is not None:
+                    yield seq, self._order[seq]
+            return
+
+        def bucket_size(field: str) -> int:
+            index = self._index[field]
+            return sum(len(index.get(v, ())) for v in filters[field])
+
+        driver = min(filters, key=bucket_size)
+        index = self._index[driver]
+        buckets = []
+        for value in filters.pop(driver):
+            seqs = index.get(value)
+            if seqs:
+                # Slice copies the tail so concurrent writes can't disturb us
+                buckets.append(seqs[bisect_right(seqs, after):])
+        if not buckets:
+            return
+        candidates = buckets[0] if len(buckets) == 1 else heapq.merge(*buckets)
+
+        for seq in candidates:
+            report = self._order[seq]
+            if report is not None and all(
+                report.get(f) in accepted for f, accepted in filters.items()
+            ):
+                yield seq, report
+
+    def count(self, **filters) -> int:
+        active = self._filters(**filters)
+        if not active:
+            return len(self)
+        if len(active) == 1:
+            (field, values), = active.items()
+            index = self._index[field]
+            return sum(len(index.get(v, ())) for v in values)
+        return sum(1 for _ in self.query(**active))
+
+    def _add(self, report: dict) -> None:
+        if report["id"] in self._by_id:
+            raise ValueError(f"Duplicate report id: {report['id']}")
+        seq = len(self._order)
+        self._order.append(report)
+        self._by_id[report["id"]] = report
+        self._seq_of[report["id"]] = seq
+        for field in self.INDEXED_FIELDS:
+            # New reports always carry the highest seq, so append keeps order
+            self._index[field][report.get(field)].append(seq)
+
+    def _update(self, report_id: str, changes: dict) -> tuple[dict, dict] | None:
+        report = self._by_id.get(report_id)
+        if report is None:
+            return None
+        seq = self._seq_of[report_id]
+        previous = {}
+        for field, value in changes.items():
+            old = previous[field] = report.get(field)
+            if field in self._index and old != value:
+                old_seqs = self._index[field][old]
+                del old_seqs[bisect_left(old_seqs, seq)]
+                if not old_seqs:
+                    del self._index[field][old]
+                insort(self._index[field][value], seq)
+            report[field] = value
+        return report, previous
+
+    def _delete(self, report_id: str) -> dict | None:
+        report = self._by_id.pop(report_id, None)
+        if report is None:
+            return None
+        seq = self._seq_of.pop(report_id)
+        self._order[seq] = None
+        for field in self.INDEXED_FIELDS:
+            seqs = self._index[field][report.get(field)]
+            del seqs[bisect_left(seqs, seq)]
+            if not seqs:
+                del self._index[field][report.get(field)]
+        return report
+
+
 # ── Seed data ────────────────────────────────────────────────────────────────
 # A handful of reports spread across Malaysia so the map isn't empty on load.
 
 _now = datetime.now(timezone.utc)
 
-reports: list[dict] = [
+_seed_reports: list[dict] = [
     # ── PERLIS ──
     {
         "id": "ps01",
@@ -759,7 +1080,7 @@ _STATUS_CHAIN = {
     "Finished": ["Reported", "Analyzed", "In Progress", "Finished"],
 }
 
-for _r in reports:
+for _r in _seed_reports:
     _ts = datetime.fromisoformat(_r["timestamp"])
     _chain = _STATUS_CHAIN.get(_r["status"], ["Reported"])
     _history = []
@@ -771,3 +1092,25 @@ for _r in reports:
             }
         )
     _r["status_history"] = _history
+
+
+# ── Backend selection ────────────────────────────────────────────────────────
+
+REPORT_STORE = os.getenv("REPORT_STORE", "sqlite").lower()
+REPORT_DB_PATH = os.getenv(
+    "REPORT_DB_PATH", os.path.join(os.path.dirname(__file__), "data", "reports.db")
+)
+
+
+def _open_store() -> ReportStore:
+    if REPORT_STORE == "memory":
+        return MemoryReportStore(_seed_reports)
+    if REPORT_STORE == "sqlite":
+        from store_sqlite import SQLiteReportStore
+
+        # Seeds are only written when the database file is first created
+        return SQLiteReportStore(REPORT_DB_PATH, seed=_seed_reports)
+    raise ValueError(f"Unknown REPORT_STORE: {REPORT_STORE!r} (use sqlite or memory)")
+
+
+reports = _open_store()
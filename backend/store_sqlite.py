@@ -0,0 +1,301 @@
+"""
+SQLite (WAL) backend for the report store.
+
+Each report is persisted as a JSON document next to indexed columns for the
+fields the API filters on. The database is opened lazily on first access
+and nothing is loaded into Python up front: every read is an indexed query.
+
+Writes go through a single connection and are group-committed. They are
+visible to readers immediately (same connection) and are committed in one
+transaction once COMMIT_BATCH writes are pending or COMMIT_INTERVAL seconds
+have passed. With WAL + synchronous=NORMAL a commit does not fsync, so a
+request only pays for executing its own statement.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+from store import ReportStore
+
+COMMIT_INTERVAL = float(os.getenv("REPORT_DB_COMMIT_INTERVAL", "0.05"))
+COMMIT_BATCH = int(os.getenv("REPORT_DB_COMMIT_BATCH", "256"))
+
+# Rows fetched per round-trip when streaming query results
+_PAGE_SIZE = 500
+
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    seq            INTEGER PRIMARY KEY AUTOINCREMENT,
+    id             TEXT NOT NULL UNIQUE,
+    status         TEXT,
+    priority_color TEXT,
+    jurisdiction   TEXT,
+    timestamp      TEXT,
+    data           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_status ON reports (status, seq);
+CREATE INDEX IF NOT EXISTS idx_reports_priority ON reports (priority_color, seq);
+CREATE INDEX IF NOT EXISTS idx_reports_jurisdiction ON reports (jurisdiction, seq);
+CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports (timestamp);
+"""
+
+# Fixed statement text so sqlite3's per-connection statement cache reuses
+# the compiled (prepared) statements on every call.
+_INSERT = (
+    "INSERT INTO reports (id, status, priority_color, jurisdiction, timestamp, data) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_UPDATE = (
+    "UPDATE reports SET status = ?, priority_color = ?, jurisdiction = ?, "
+    "timestamp = ?, data = ? WHERE id = ?"
+)
+_GET = "SELECT data FROM reports WHERE id = ?"
+_DELETE = "DELETE FROM reports WHERE id = ?"
+_COUNT = "SELECT COUNT(*) FROM reports"
+
+
+def _row(report: dict) -> tuple:
+    return (
+        report.get("status"),
+        report.get("priority_color"),
+        report.get("jurisdiction"),
+        report.get("timestamp"),
+        json.dumps(report, separators=(",", ":")),
+    )
+
+
+class SQLiteReportStore(ReportStore):
+    """
+    Report store persisted in a SQLite database in WAL mode.
+
+    Sequence numbers are the table's INTEGER PRIMARY KEY. `seed` (a list or
+    a callable returning one) is inserted only when the database file is
+    created, so restarts keep whatever the previous run stored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        seed: Iterable[dict] | Callable[[], Iterable[dict]] = (),
+        commit_interval: float = COMMIT_INTERVAL,
+        commit_batch: int = COMMIT_BATCH,
+    ):
+        super().__init__()
+        self.path = path
+        self.commit_interval = commit_interval
+        self.commit_batch = commit_batch
+        self._seed = seed
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._count: int | None = None
+        self._wake = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._closed = False
+
+    # ── Connection ──
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    self._open()
+        return self._db
+
+    def _open(self) -> None:
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves for group commit
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < _SCHEMA_VERSION:
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._db = conn
+        atexit.register(self.close)
+
+        if version == 0:
+            seed = self._seed() if callable(self._seed) else self._seed
+            self.add_many(seed)
+            self.flush()
+        self._seed = ()
+
+    def _wrote(self, n: int = 1) -> None:
+        """Account for `n` uncommitted writes; commit or schedule a commit."""
+        self._pending += n
+        if self._pending >= self.commit_batch:
+            self.flush()
+            return
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="report-db-flusher", daemon=True
+            )
+            self._flusher.start()
+        self._wake.set()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.commit_interval)
+            self.flush()
+
+    def _begin(self) -> None:
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+
+    def flush(self) -> None:
+        """Commit all pending writes."""
+        with self._lock:
+            if self._closed:
+                return  # the flusher woke up after close()
+            if self._db is not None and self._db.in_transaction:
+                self._db.execute("COMMIT")
+            self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is None or self._closed:
+                return
+            self.flush()
+            self._closed = True
+            self._wake.set()
+            self._db.close()
+
+    # ── Reads ──
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._count is None:
+                self._count = self._conn.execute(_COUNT).fetchone()[0]
+            return self._count
+
+    def __iter__(self) -> Iterator[dict]:
+        return (report for _, report in self.query())
+
+    def get(self, report_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(_GET, (report_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def values(self, field: str) -> list[str]:
+        if field not in self.INDEXED_FIELDS:
+            raise ValueError(f"Not an indexed field: {field}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT {field} FROM reports WHERE {field} IS NOT NULL"
+            ).fetchall()
+        return [value for (value,) in rows]
+
+    def _where(self, filters: dict[str, set]) -> tuple[str, list]:
+        clauses, params = [], []
+        for field, accepted in filters.items():
+            if field not in self.INDEXED_FIELDS:
+                raise ValueError(f"Not an indexed field: {field}")
+            clauses.append(f"{field} IN ({', '.join('?' * len(accepted))})")
+            params.extend(accepted)
+        return " AND ".join(clauses), params
+
+    def query(
+        self,
+        *,
+        status: str | Iterable[str] | None = None,
+        priority_color: str | Iterable[str] | None = None,
+        jurisdiction: str | Iterable[str] | None = None,
+        after: int = -1,
+    ) -> Iterator[tuple[int, dict]]:
+        """Results are streamed in pages of _PAGE_SIZE rows (keyset paging)."""
+        where, params = self._where(
+            self._filters(
+                status=status, priority_color=priority_color, jurisdiction=jurisdiction
+            )
+        )
+        sql = (
+            "SELECT seq, data FROM reports WHERE seq > ?"
+            + (f" AND {where}" if where else "")
+            + f" ORDER BY seq LIMIT {_PAGE_SIZE}"
+        )
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, (after, *params)).fetchall()
+            for seq, data in rows:
+                yield seq, json.loads(data)
+            if len(rows) < _PAGE_SIZE:
+                return
+            after = rows[-1][0]
+
+    def count(self, **filters) -> int:
+        active = self._filters(**filters)
+        if not active:
+            return len(self)
+        where, params = self._where(active)
+        with self._lock:
+            return self._conn.execute(f"{_COUNT} WHERE {where}", params).fetchone()[0]
+
+    # ── Writes ──
+
+    def _add(self, report: dict) -> None:
+        with self._lock:
+            self._begin()
+            try:
+                self._conn.execute(_INSERT, (report["id"], *_row(report)))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Duplicate report id: {report['id']}")
+            if self._count is not None:
+                self._count += 1
+            self._wrote()
+
+    def _add_many(self, reports: list[dict]) -> list[dict]:
+        if not reports:
+            return reports
+        with self._lock:
+            self._begin()
+            # All or nothing: a duplicate must not leave the rows before it
+            # in the open group-commit transaction
+            self._conn.execute("SAVEPOINT add_many")
+            try:
+                self._conn.executemany(
+                    _INSERT, [(r["id"], *_row(r)) for r in reports]
+                )
+            except sqlite3.IntegrityError as e:
+                self._conn.execute("ROLLBACK TO add_many")
+                self._conn.execute("RELEASE add_many")
+                raise ValueError(f"Duplicate report id in batch: {e}")
+            self._conn.execute("RELEASE add_many")
+            if self._count is not None:
+                self._count += len(reports)
+            self._wrote(len(reports))
+        return reports
+
+    def _update(self, report_id: str, changes: dict) -> tuple[dict, dict] | None:
+        with self._lock:
+            report = self.get(report_id)
+            if report is None:
+                return None
+            previous = {field: report.get(field) for field in changes}
+            report.update(changes)
+            self._begin()
+            self._conn.execute(_UPDATE, (*_row(report), report_id))
+            self._wrote()
+        return report, previous
+
+    def _delete(self, report_id: str) -> dict | None:
+        with self._lock:
+            report = self.get(report_id)
+            if report is None:
+                return None
+            self._begin()
+            self._conn.execute(_DELETE, (report_id,))
+            if self._count is not None:
+                self._count -= 1
+            self._wrote()
+        return report
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Offline backends; settings are read when the app modules are imported
+os.environ.setdefault("REPORT_STORE", "memory")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("IMAGE_STORE_DIR", tempfile.mkdtemp(prefix="potsoft-test-"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,41 @@
+import asyncio
+import io
+
+from PIL import Image
+
+from services.analysis_worker import DEFAULT_ANALYSIS, AnalysisWorkers
+from services.blob_store import blobs
+from store import MemoryReportStore
+
+
+def _pending(report_id: str, sha: str) -> dict:
+    return {
+        "id": report_id,
+        "user_lat": 3.1,
+        "user_long": 101.6,
+        "image_sha256": sha,
+        "image_mime": "image/jpeg",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "status": "Reported",
+        "status_history": [],
+        "analysis_pending": True,
+    }
+
+
+def test_unreadable_image_does_not_block_its_batch():
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), "gray").save(buf, "JPEG")
+    sha = blobs.put(buf.getvalue())
+    store = MemoryReportStore(
+        [_pending("ok", sha), _pending("gone", "0" * 64), _pending("ok2", sha)]
+    )
+    workers = AnalysisWorkers(store)
+
+    results = asyncio.run(workers.analyze_many(["ok", "gone", "ok2"]))
+
+    assert [r["id"] for r in results] == ["ok", "gone", "ok2"]
+    assert not any(r["analysis_pending"] for r in results)
+    assert all(r["status"] == "Analyzed" for r in results)
+    gone = store.get("gone")
+    assert gone["priority_color"] == DEFAULT_ANALYSIS["priority_color"]
+    assert workers.defaulted == 1
@@ -0,0 +1,48 @@
+import io
+import time
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from main import app
+from services.analysis_worker import DEFAULT_ANALYSIS, analysis_workers
+from services.circuit_breaker import CircuitBreaker
+from services.gemini_client import client
+from store import reports
+
+
+def _jpeg() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), "gray").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def test_open_analysis_circuit(monkeypatch):
+    breaker = CircuitBreaker("analysis", min_calls=1)
+    breaker.record(breaker.allow(), False, 0.1)
+    assert breaker.state == "open"
+    monkeypatch.setitem(client.circuits, "analysis", breaker)
+
+    with TestClient(app) as http:
+        response = http.post(
+            "/analyze", files={"file": ("road.jpg", _jpeg(), "image/jpeg")}
+        )
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) > 0
+
+        # Report analysis still falls back to the default analysis
+        defaulted = analysis_workers.defaulted
+        created = http.post(
+            "/api/reports",
+            data={"lat": "3.1", "long": "101.7"},
+            files={"image": ("road.jpg", _jpeg(), "image/jpeg")},
+        )
+        assert created.status_code == 202
+        report_id = created.json()["id"]
+        deadline = time.monotonic() + 5
+        while reports.get(report_id)["analysis_pending"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        report = reports.get(report_id)
+        assert not report["analysis_pending"]
+        assert report["is_pothole"] == DEFAULT_ANALYSIS["is_pothole"]
+        assert analysis_workers.defaulted == defaulted + 1
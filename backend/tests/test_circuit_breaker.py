@@ -0,0 +1,47 @@
+import pytest
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _half_open(slow_call: float = 5.0) -> tuple[CircuitBreaker, int]:
+    """A breaker that just let its probe through, and a call from before the trip."""
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=0, slow_call=slow_call)
+    stale = breaker.allow()
+    breaker.record(breaker.allow(), False, 0.1)
+    assert breaker.state == "open"
+    return breaker, stale
+
+
+def test_only_the_probe_settles_half_open():
+    breaker, stale = _half_open()
+    probe = breaker.allow()
+    assert breaker.state == "half_open"
+
+    # The pre-trip call finishing late neither closes the circuit...
+    breaker.record(stale, True, 0.1)
+    assert breaker.state == "half_open"
+    # ...nor frees the probe slot
+    breaker.abandon(stale)
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record(probe, True, 0.1)
+    assert breaker.state == "closed"
+
+
+def test_stale_results_do_not_count_after_closing():
+    breaker, stale = _half_open()
+    breaker.record(breaker.allow(), True, 0.1)
+    assert breaker.state == "closed"
+
+    breaker.record(stale, False, 10.0)
+    assert breaker.state == "closed"
+    assert breaker.stats()["window_calls"] == 0
+
+
+def test_abandoned_probe_lets_the_next_one_through():
+    breaker, _ = _half_open()
+    breaker.abandon(breaker.allow())
+    probe = breaker.allow()
+    breaker.record(probe, False, 0.1)
+    assert breaker.state == "open"
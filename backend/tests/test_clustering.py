@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from services.clustering import GRID_MAX_ZOOM, ReportClusters
+from store import MemoryReportStore
+
+
+def _report(report_id: str, lat: float, lng: float, priority: str = "Green") -> dict:
+    return {
+        "id": report_id,
+        "user_lat": lat,
+        "user_long": lng,
+        "priority_color": priority,
+        "status": "Reported",
+        "jurisdiction": "MBPJ",
+    }
+
+
+def _totals(clusters: list[dict]) -> tuple[int, dict]:
+    priority: dict[str, int] = {}
+    for cluster in clusters:
+        for color, count in cluster["priority"].items():
+            priority[color] = priority.get(color, 0) + count
+    return sum(c["count"] for c in clusters), priority
+
+
+def test_writes_during_the_build_are_replayed():
+    store = MemoryReportStore(
+        [_report(f"r{i}", 3.0 + i / 1000, 101.5 + i / 1000) for i in range(2000)]
+    )
+    clusters = ReportClusters(store)
+
+    async def scenario():
+        building = asyncio.ensure_future(clusters.ready())
+        store.update("r0", priority_color="Red")
+        store.update("r1", user_lat=4.0, user_long=102.0)
+        store.update("r1", user_lat=5.0, user_long=103.0)
+        store.delete("r2")
+        store.add(_report("new", 3.2, 101.7, "Yellow"))
+        await building
+
+    asyncio.run(scenario())
+    for zoom in range(GRID_MAX_ZOOM + 1):
+        assert _totals(clusters.clusters(zoom)) == (
+            2000,
+            {"Green": 1998, "Red": 1, "Yellow": 1},
+        )
+    # r1 ended up alone at (5, 103)
+    [moved] = clusters.clusters(GRID_MAX_ZOOM, (102.9, 4.9, 103.1, 5.1))
+    assert moved["count"] == 1
+
+
+def test_fine_zooms_bucket_the_points_under_the_bbox():
+    store = MemoryReportStore(
+        [_report("a", 3.1, 101.6), _report("b", 3.1001, 101.6001), _report("c", 3.2, 101.7)]
+    )
+    clusters = ReportClusters(store)
+    asyncio.run(clusters.ready())
+    bbox = (101.55, 3.05, 101.65, 3.15)
+
+    assert [c["count"] for c in clusters.clusters(16, bbox)] == [2]
+    assert sorted(c["count"] for c in clusters.clusters(20, bbox)) == [1, 1]
+    with pytest.raises(ValueError):
+        clusters.clusters(16)
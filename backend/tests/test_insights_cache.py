@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from services import insights_service
+from store import MemoryReportStore, _seed_reports
+
+
+def test_stale_insight_is_regenerated():
+    insights_service.clear_cache()
+    reports = MemoryReportStore(_seed_reports)
+    calls = []
+
+    async def generate(store, data):
+        # Uses the prompt data, as the real generators do
+        calls.append(data.summary["total_reports"])
+        return {"generation": len(calls)}
+
+    async def scenario():
+        first = await insights_service._cached("test", reports, generate)
+        assert first == {"generation": 1}
+
+        # Age the entry past the TTL: served stale, refreshed in the background
+        version, created, data = insights_service._cache["test"]
+        insights_service._cache["test"] = (version, created - 400, data)
+        stale = await insights_service._cached("test", reports, generate)
+        assert stale == {"generation": 1}
+        await insights_service._inflight["test"]
+
+        fresh = await insights_service._cached("test", reports, generate)
+        assert fresh == {"generation": 2}
+        assert time.time() - insights_service._cache["test"][1] < 5
+
+    asyncio.run(scenario())
+    assert calls == [len(_seed_reports)] * 2
+    insights_service.clear_cache()
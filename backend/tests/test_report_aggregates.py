@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+from services.report_aggregates import ReportAggregates
+from store import MemoryReportStore
+
+NOW = datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+
+def _report(report_id: str, hours_ago: float | None, status: str = "Reported") -> dict:
+    timestamp = (NOW - timedelta(hours=hours_ago)).isoformat() if hours_ago else "?"
+    return {
+        "id": report_id,
+        "timestamp": timestamp,
+        "status": status,
+        "jurisdiction": "MBPJ",
+        "priority_color": "Green",
+        "size_category": "Small",
+    }
+
+
+def test_overdue_ids_follow_store_order():
+    store = MemoryReportStore([])
+    aggregates = ReportAggregates(store)
+    store.add_many([_report("new", 30), _report("old", 90), _report("fresh", 1)])
+    store.add(_report("older", 200))
+    # Back to Reported later: it keeps its place in the store
+    store.set_status("new", "In Progress")
+    store.set_status("new", "Reported")
+
+    summary = aggregates.summary(NOW)
+    assert summary["overdue_count"] == 3
+    assert summary["overdue_ids"] == ["new", "old", "older"]
+    assert summary["jurisdictions"]["MBPJ"]["overdue"] == 3
+
+
+def test_undated_open_report_counts_as_age_zero():
+    store = MemoryReportStore([_report("a", 10), _report("b", None, "In Progress")])
+    summary = ReportAggregates(store).summary(NOW)
+    assert summary["avg_age_hours"] == 10.0
+    assert summary["jurisdictions"]["MBPJ"]["avg_open_hours"] == 5.0
+    assert summary["overdue_ids"] == []
+
+
+def test_overdue_count_follows_the_clock():
+    store = MemoryReportStore([_report(f"r{h}", h) for h in range(1, 49)])
+    aggregates = ReportAggregates(store)
+
+    # Reports older than 24 hours, as "now" moves forward and back
+    for shift in (0, 0.5, 3, 30, 1, 0):
+        later = NOW + timedelta(hours=shift)
+        expected = sum(1 for h in range(1, 49) if h + shift > 24)
+        assert aggregates.summary(later)["overdue_count"] == expected
+
+    store.set_status("r40", "Finished")
+    store.add(_report("late", 100))
+    assert aggregates.summary(NOW)["overdue_count"] == 24
@@ -0,0 +1,51 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from services.report_ingest import ArchiveError, import_archive
+from store import MemoryReportStore
+
+
+def _zip(members: dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+def _collect(archive: bytes, manifest: bytes) -> list[dict]:
+    async def run():
+        results = import_archive(
+            MemoryReportStore([]), io.BytesIO(archive), io.BytesIO(manifest)
+        )
+        return [result async for result in results]
+
+    return asyncio.run(run())
+
+
+def test_corrupt_zip_is_an_archive_error():
+    data = _zip({"a.jpg": b"A" * 100})
+    # The end record survives, so it still looks like a zip
+    corrupt = b"\0" * 64 + data[-22:]
+    assert zipfile.is_zipfile(io.BytesIO(corrupt))
+    with pytest.raises(ArchiveError):
+        _collect(corrupt, b'{"file": "a.jpg", "lat": 3.1, "long": 101.7}\n')
+
+
+def test_unreadable_member_is_reported_and_stream_completes():
+    data = _zip({"a.jpg": b"A" * 100, "b.jpg": b"not an image"})
+    # Same length, different bytes: a CRC mismatch when a.jpg is read
+    corrupt = data.replace(b"A" * 100, b"B" * 100)
+    manifest = (
+        b'{"file": "a.jpg", "lat": 3.1, "long": 101.7}\n'
+        b'{"file": "b.jpg", "lat": 3.1, "long": 101.7}\n'
+    )
+    results = _collect(corrupt, manifest)
+
+    assert results[0]["index"] == 0
+    assert results[0]["error"].startswith("Cannot read file from archive")
+    assert results[1] == {"index": 1, "file": "b.jpg", "error": "Not a readable image."}
+    assert results[-1] == {"done": True, "accepted": 0, "failed": 2}
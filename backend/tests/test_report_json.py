@@ -0,0 +1,29 @@
+from services.report_json import ReportJSONCache
+from store import MemoryReportStore
+
+
+def _report(report_id: str) -> dict:
+    return {"id": report_id, "user_lat": 3.1, "user_long": 101.6, "status": "Reported"}
+
+
+def test_fragments_are_bounded_lru():
+    store = MemoryReportStore([_report(i) for i in "abc"])
+    cache = ReportJSONCache(store, max_entries=2)
+    a, b, c = (store.get(i) for i in "abc")
+
+    cache.encode_list([a, b])
+    cache.fragment(a)  # a is now the most recently served
+    cache.fragment(c)  # evicts b
+    assert cache.stats() == {"hits": 1, "misses": 3, "entries": 2}
+
+    cache.fragment(a)
+    cache.fragment(b)
+    assert cache.stats() == {"hits": 2, "misses": 4, "entries": 2}
+
+
+def test_write_invalidates_fragment():
+    store = MemoryReportStore([_report("a")])
+    cache = ReportJSONCache(store)
+    assert b'"Reported"' in cache.fragment(store.get("a"))
+    store.update("a", status="Fixed")
+    assert b'"Fixed"' in cache.fragment(store.get("a"))
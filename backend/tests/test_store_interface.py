@@ -0,0 +1,29 @@
+import pytest
+
+from store import MemoryReportStore, ReportStore
+
+
+def test_incomplete_backend_fails_at_instantiation():
+    class NoDelete(MemoryReportStore):
+        _delete = ReportStore._delete
+
+    with pytest.raises(TypeError, match="_delete"):
+        NoDelete()
+
+
+def test_backends_implement_the_interface():
+    assert isinstance(MemoryReportStore(), ReportStore)
+
+
+def test_listener_is_created_once_per_store():
+    created = []
+
+    def factory(store):
+        created.append(store)
+        return object()
+
+    first, second = MemoryReportStore(), MemoryReportStore()
+    view = first.listener("view", factory)
+    assert first.listener("view", factory) is view
+    assert second.listener("view", factory) is not view
+    assert created == [first, second]
@@ -0,0 +1,35 @@
+import pytest
+
+from store_sqlite import SQLiteReportStore
+
+
+def _report(report_id: str) -> dict:
+    return {
+        "id": report_id,
+        "user_lat": 3.1,
+        "user_long": 101.6,
+        "image_file": f"/api/reports/{report_id}/image",
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "status": "Reported",
+    }
+
+
+def test_add_many_with_duplicate_inserts_nothing(tmp_path):
+    path = str(tmp_path / "reports.db")
+    store = SQLiteReportStore(path)
+    store.add(_report("a"))
+    with pytest.raises(ValueError):
+        store.add_many([_report("b"), _report("c"), _report("a")])
+    assert len(store) == 1
+    store.close()
+
+    reopened = SQLiteReportStore(path)
+    assert [r["id"] for r in reopened] == ["a"]
+    reopened.close()
+
+
+def test_flush_after_close_is_a_no_op(tmp_path):
+    store = SQLiteReportStore(str(tmp_path / "reports.db"))
+    store.add(_report("a"))
+    store.close()
+    store.flush()
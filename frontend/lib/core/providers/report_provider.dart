@@ -1,3 +1,4 @@
+import 'dart:async';
 import 'dart:convert';
 import 'dart:typed_data';
 import 'package:flutter/material.dart';
@@ -11,6 +12,11 @@ class ReportProvider extends ChangeNotifier {
   bool _isLoading = false;
   String? _error;
 
+  // Live change stream (GET /api/reports/events)
+  StreamSubscription<Map<String, dynamic>>? _events;
+  String? _lastEventId;
+  bool _disposed = false;
+
   // AI Insights state
   Map<String, dynamic>? _insightSummary;
   Map<String, dynamic>? _insightTrends;
@@ -53,8 +59,16 @@ class ReportProvider extends ChangeNotifier {
     notifyListeners();
 
     try {
-      final jsonList = await _api.fetchReports();
-      _reports = jsonList.map((json) => PotholeReport.fromJson(json)).toList();
+      final since = _api.storeVersion;
+      if (since != null && _reports.isNotEmpty) {
+        _applyChanges(await _api.fetchReportChanges(since));
+      } else {
+        final jsonList = await _api.fetchReports();
+        _reports =
+            jsonList.map((json) => PotholeReport.fromJson(json)).toList();
+      }
+      _lastEventId = _api.storeVersion;
+      if (_events == null) watchReports();
     } catch (e) {
       _error = e.toString();
       debugPrint('loadReports error: $e');
@@ -64,6 +78,80 @@ class ReportProvider extends ChangeNotifier {
     }
   }
 
+  /// Merge a delta from [ApiService.fetchReportChanges] (null: unchanged).
+  void _applyChanges(Map<String, dynamic>? changes) {
+    if (changes == null) return;
+    final changed = (changes['reports'] as List)
+        .cast<Map<String, dynamic>>()
+        .map(PotholeReport.fromJson)
+        .toList();
+    if (changes['full'] == true) {
+      _reports = changed;
+      return;
+    }
+    final gone = (changes['deleted'] as List).cast<String>().toSet();
+    final byId = {for (final r in changed) r.id: r};
+    _reports = [
+      // Updated reports keep their place; new ones go to the end
+      for (final r in _reports)
+        if (!gone.contains(r.id)) byId.remove(r.id) ?? r,
+      ...byId.values,
+    ];
+  }
+
+  /// Keep [reports] current from the server's change stream instead of
+  /// re-downloading the list. Reconnects resume from the last event seen.
+  void watchReports() {
+    _events?.cancel();
+    _events = _api
+        .streamReportEvents(lastEventId: _lastEventId)
+        .listen(
+          _applyEvent,
+          onError: (Object e) {
+            debugPrint('watchReports error: $e');
+            _rewatch();
+          },
+          onDone: _rewatch,
+          cancelOnError: true,
+        );
+  }
+
+  void _rewatch() {
+    _events = null;
+    Future.delayed(const Duration(seconds: 3), () {
+      if (!_disposed && _events == null) watchReports();
+    });
+  }
+
+  void _applyEvent(Map<String, dynamic> event) {
+    _lastEventId = event['id'] as String? ?? _lastEventId;
+    final data = event['data'] as Map<String, dynamic>;
+    final index = _reports.indexWhere((r) => r.id == data['id']);
+    switch (event['event']) {
+      case 'reset':
+        loadReports();
+        return;
+      case 'deleted':
+        if (index == -1) return;
+        _reports.removeAt(index);
+      default:
+        final report = PotholeReport.fromJson(data);
+        if (index == -1) {
+          _reports.add(report);
+        } else {
+          _reports[index] = report;
+        }
+    }
+    notifyListeners();
+  }
+
+  @override
+  void dispose() {
+    _disposed = true;
+    _events?.cancel();
+    super.dispose();
+  }
+
   // Submit a new report (image + GPS -> Gemini analysis)
   Future<PotholeReport?> submitReport(
     double lat,
@@ -135,36 +223,31 @@ class ReportProvider extends ChangeNotifier {
     _insightJurisdictions = null;
     notifyListeners();
 
-    // Fire all 4 concurrently but handle each individually
-    final futures = <Future<void>>[
-      _api.fetchInsightSummary().then((data) {
-        _insightSummary = data;
-        _summaryLoading = false;
-        _insightsCompleted++;
-        notifyListeners();
-      }),
-      _api.fetchInsightTrends().then((data) {
-        _insightTrends = data;
-        _trendsLoading = false;
-        _insightsCompleted++;
-        notifyListeners();
-      }),
-      _api.fetchInsightRecommendations().then((data) {
-        _insightRecommendations = data;
-        _recommendationsLoading = false;
-        _insightsCompleted++;
-        notifyListeners();
-      }),
-      _api.fetchInsightJurisdictions().then((data) {
-        _insightJurisdictions = data;
-        _jurisdictionsLoading = false;
+    // One streamed request: each section arrives as soon as it is ready
+    try {
+      await for (final item in _api.streamInsights()) {
+        final section = item['section'] as String?;
+        final data = item['data'] as Map<String, dynamic>?;
+        if (item['error'] != null) {
+          _insightsError = item['error'].toString();
+        }
+        switch (section) {
+          case 'summary':
+            _insightSummary = data;
+            _summaryLoading = false;
+          case 'trends':
+            _insightTrends = data;
+            _trendsLoading = false;
+          case 'recommendations':
+            _insightRecommendations = data;
+            _recommendationsLoading = false;
+          case 'jurisdictions':
+            _insightJurisdictions = data;
+            _jurisdictionsLoading = false;
+        }
         _insightsCompleted++;
         notifyListeners();
-      }),
-    ];
-
-    try {
-      await Future.wait(futures);
+      }
     } catch (e) {
       _insightsError = e.toString();
       debugPrint('loadInsights error: $e');
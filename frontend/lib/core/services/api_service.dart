@@ -10,6 +10,10 @@ import 'package:http/http.dart' as http;
 class ApiService {
   final String baseUrl;
 
+  /// `X-Store-Version` of the last [fetchReports] response: the point to
+  /// resume [streamReportEvents] from without missing a change.
+  String? storeVersion;
+
   ApiService({
     this.baseUrl = const String.fromEnvironment(
       'API_URL',
@@ -23,13 +27,41 @@ class ApiService {
     final response = await http.get(uri);
 
     if (response.statusCode == 200) {
+      storeVersion = response.headers['x-store-version'];
       final List<dynamic> body = jsonDecode(response.body);
-      return body.cast<Map<String, dynamic>>();
+      return body.cast<Map<String, dynamic>>().map(_resolveImageUrl).toList();
     } else {
       throw ApiException('Failed to load reports (${response.statusCode})');
     }
   }
 
+  /// Changes since [since] (a previous [storeVersion]): `reports` created or
+  /// modified after it and `deleted` ids. When `full` is true the server
+  /// could not build a delta and `reports` is the whole list.
+  /// Returns null if nothing changed (304 for the If-None-Match ETag).
+  Future<Map<String, dynamic>?> fetchReportChanges(String since) async {
+    final uri = Uri.parse(
+      '$baseUrl/api/reports',
+    ).replace(queryParameters: {'since': since});
+    final response = await http.get(
+      uri,
+      headers: {'If-None-Match': 'W/"$since"'},
+    );
+
+    if (response.statusCode == 304) return null;
+    if (response.statusCode == 200) {
+      storeVersion = response.headers['x-store-version'];
+      final body = jsonDecode(response.body) as Map<String, dynamic>;
+      body['reports'] = (body['reports'] as List)
+          .cast<Map<String, dynamic>>()
+          .map(_resolveImageUrl)
+          .toList();
+      return body;
+    } else {
+      throw ApiException('Failed to load changes (${response.statusCode})');
+    }
+  }
+
   // ── POST /api/reports ───────────────────────────────────────────────────
   /// Submits a new pothole report.
   ///
@@ -58,8 +90,9 @@ class ApiService {
     final streamed = await request.send();
     final body = await streamed.stream.bytesToString();
 
-    if (streamed.statusCode == 201) {
-      return jsonDecode(body) as Map<String, dynamic>;
+    // 202: stored as "Reported"; the server fills in the analysis shortly
+    if (streamed.statusCode == 202 || streamed.statusCode == 201) {
+      return _resolveImageUrl(jsonDecode(body) as Map<String, dynamic>);
     } else {
       throw ApiException(
         'Failed to submit report (${streamed.statusCode}): $body',
@@ -88,8 +121,109 @@ class ApiService {
     }
   }
 
+  // ── GET /api/reports/events (Server-Sent Events) ────────────────────────
+  /// Streams live report changes. Each item has `id`, `event` (`created`,
+  /// `status_changed`, `updated`, `deleted` or `reset`) and `data` (the
+  /// report, or just its `id` when deleted).
+  ///
+  /// Pass the `id` of the last event seen (or [storeVersion]) as
+  /// [lastEventId] to resume without missing changes. A `reset` event
+  /// means the gap could not be replayed and the list should be reloaded.
+  Stream<Map<String, dynamic>> streamReportEvents({String? lastEventId}) async* {
+    final client = http.Client();
+    try {
+      final request = http.Request(
+        'GET',
+        Uri.parse('$baseUrl/api/reports/events'),
+      );
+      request.headers['Accept'] = 'text/event-stream';
+      if (lastEventId != null) request.headers['Last-Event-ID'] = lastEventId;
+      final response = await client.send(request);
+      if (response.statusCode != 200) {
+        throw ApiException('Failed to watch reports (${response.statusCode})');
+      }
+
+      String? id;
+      var event = 'message';
+      final data = StringBuffer();
+      final lines = response.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter());
+      await for (final line in lines) {
+        if (line.isEmpty) {
+          // Blank line: dispatch the event collected so far
+          if (data.isNotEmpty) {
+            final payload = jsonDecode(data.toString()) as Map<String, dynamic>;
+            yield {
+              'id': id,
+              'event': event,
+              'data': event == 'deleted' ? payload : _resolveImageUrl(payload),
+            };
+          }
+          event = 'message';
+          data.clear();
+          continue;
+        }
+        if (line.startsWith(':')) continue; // keep-alive comment
+        final colon = line.indexOf(':');
+        final field = colon == -1 ? line : line.substring(0, colon);
+        var value = colon == -1 ? '' : line.substring(colon + 1);
+        if (value.startsWith(' ')) value = value.substring(1);
+        switch (field) {
+          case 'id':
+            id = value;
+          case 'event':
+            event = value;
+          case 'data':
+            if (data.isNotEmpty) data.write('\n');
+            data.write(value);
+        }
+      }
+    } finally {
+      client.close();
+    }
+  }
+
+  /// Report images are served by the backend at a relative URL
+  /// (`/api/reports/<id>/image`); make it absolute so `Image.network` works.
+  Map<String, dynamic> _resolveImageUrl(Map<String, dynamic> report) {
+    final image = report['image_file'];
+    if (image is String && image.startsWith('/')) {
+      report['image_file'] = '$baseUrl$image';
+    }
+    return report;
+  }
+
   // ── AI Insights endpoints ───────────────────────────────────────────────
 
+  /// Streams all four insight sections from `GET /api/insights/all`.
+  ///
+  /// The backend builds the data summary once, runs the four Gemini prompts
+  /// concurrently and writes one NDJSON line per section as it finishes:
+  /// `{"section": "trends", "data": {...}}` or `{"section": ..., "error": ...}`.
+  Stream<Map<String, dynamic>> streamInsights() async* {
+    final client = http.Client();
+    try {
+      final request = http.Request(
+        'GET',
+        Uri.parse('$baseUrl/api/insights/all'),
+      );
+      final response = await client.send(request);
+      if (response.statusCode != 200) {
+        throw ApiException('Failed to load insights (${response.statusCode})');
+      }
+      final lines = response.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter());
+      await for (final line in lines) {
+        if (line.trim().isEmpty) continue;
+        yield jsonDecode(line) as Map<String, dynamic>;
+      }
+    } finally {
+      client.close();
+    }
+  }
+
   Future<Map<String, dynamic>> fetchInsightSummary() async {
     final uri = Uri.parse('$baseUrl/api/insights/summary');
     final response = await http.get(uri);